@@ -0,0 +1,180 @@
+"""Benchmark of page loads in the browser from robot_framework.browser, set up as in config and with the lean settings
+below, against a browser set up like eflyt_login.login with a full window, normal page loads and nothing blocked.
+Each browser logs into the fake eFlyt, opens each case and clicks each person on it, like a lookup does.
+Requires Chrome. Memory is the summed RSS of chromedriver and the Chrome processes it started, read from /proc,
+so it's only reported on Linux.
+
+Usage: python -m benchmarks.bench_browser [case count] [latency in seconds]
+"""
+
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable
+from unittest import mock
+from urllib.parse import urljoin
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from itk_dev_shared_components.eflyt.eflyt_login import ResilientBrowser
+from benchmarks.fake_eflyt import FakeEflyt, FakeEflytServer, USERNAME, PASSWORD, generate_cases
+from robot_framework import browser as browser_factory
+from robot_framework import config, process
+
+
+def create_default_browser() -> ResilientBrowser:
+    """Start a browser set up the way eflyt_login.login does."""
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--disable-search-engine-choice-screen")
+    browser = ResilientBrowser(options=chrome_options)
+    browser.maximize_window()
+    browser.implicitly_wait(2)
+    return browser
+
+
+# The config values of the lean browser: headless in a smaller window, eager page loads, no images, stylesheets, fonts or media,
+# and Chrome arguments keeping down memory use. They are off in config until measured against eFlyt.
+LEAN_SETTINGS = {
+    "BROWSER_HEADLESS": True,
+    "BROWSER_WINDOW_SIZE": "1280,1024",
+    "BROWSER_PAGE_LOAD_STRATEGY": "eager",
+    "BROWSER_BLOCKED_URLS": (
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.svg", "*.webp",
+        "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.mp3", "*.mp4", "*.webm", "*.avi", "*.wav"
+    ),
+    "BROWSER_ARGUMENTS": (
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-dev-shm-usage",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--no-first-run",
+        "--mute-audio",
+        "--renderer-process-limit=1",
+        "--js-flags=--max-old-space-size=128"
+    ),
+}
+
+
+def create_lean_browser() -> ResilientBrowser:
+    """Start a browser with browser.create_browser and the config values in LEAN_SETTINGS."""
+    with ExitStack() as stack:
+        for name, value in LEAN_SETTINGS.items():
+            stack.enter_context(mock.patch.object(config, name, value))
+        return browser_factory.create_browser()
+
+
+PROFILES: dict[str, Callable[[], ResilientBrowser]] = {
+    "eflyt_login": create_default_browser,
+    "config": browser_factory.create_browser,
+    "lean": create_lean_browser,
+}
+
+
+def open_case(browser: webdriver.Chrome, case: str) -> None:
+    """Open a case the way eflyt_search.open_case does, on config.EFLYT_URL."""
+    browser.get(urljoin(config.EFLYT_URL, "/web/SearchResulteFlyt.aspx"))
+    case_input = browser.find_element(By.ID, "ctl00_ContentPlaceHolder1_SearchControl_txtSagNr")
+    case_input.clear()
+    case_input.send_keys(case)
+    browser.find_element(By.ID, "ctl00_ContentPlaceHolder1_SearchControl_btnSearch").click()
+    browser.find_element(By.ID, config.MOVING_PERSONS_TABLE_ID)
+
+
+def process_tree_rss(pid: int) -> float | None:
+    """Sum the RSS in MiB of a process and all its descendants, or None if /proc isn't available."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+
+    children: dict[int, list[int]] = {}
+    for stat in proc.glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text(encoding="utf-8").rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            status = (proc / str(current) / "status").read_text(encoding="utf-8")
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1])
+    return total / 2**10
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[max(0, -(-len(values) * percentile // 100) - 1)]
+
+
+def run_profile(name: str, eflyt: FakeEflyt) -> dict:
+    """Log in with a browser profile, open every case and click every person on it, timing each page load."""
+    eflyt.asset_request_count = 0
+    start = time.perf_counter()
+    browser = PROFILES[name]()
+    startup = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        browser_factory.login_browser(browser, USERNAME, PASSWORD)
+        login = time.perf_counter() - start
+
+        case_loads = []
+        person_loads = []
+        for case, persons in eflyt.cases.items():
+            start = time.perf_counter()
+            open_case(browser, case)
+            case_loads.append(time.perf_counter() - start)
+
+            moving_persons = process._get_moving_persons(browser)  # pylint: disable=protected-access
+            for person in persons:
+                start = time.perf_counter()
+                process._get_phone_numbers(browser, moving_persons[person.cpr.replace("-", "")])  # pylint: disable=protected-access
+                person_loads.append(time.perf_counter() - start)
+
+        rss = process_tree_rss(browser.service.process.pid)
+    finally:
+        browser.quit()
+
+    return {
+        "startup": startup,
+        "login": login,
+        "case_p50": statistics.median(case_loads),
+        "case_p95": _percentile(case_loads, 95),
+        "person_p50": statistics.median(person_loads),
+        "person_p95": _percentile(person_loads, 95),
+        "rss": rss,
+        "assets": eflyt.asset_request_count,
+    }
+
+
+def main(case_count: int = 20, latency: float = 0.02):
+    """Run each browser profile against the fake eFlyt and print a table of the results."""
+    eflyt = FakeEflyt(generate_cases(case_count), float(latency))
+    with FakeEflytServer(eflyt) as server, mock.patch.object(config, "EFLYT_URL", server.url):
+        results = {name: run_profile(name, eflyt) for name in PROFILES}
+
+    print(f"{case_count} cases, {eflyt.latency * 1000:.0f} ms latency per request, times in ms")
+    print(f"{'Profile':<12} {'Startup':>8} {'Login':>8} {'Case p50':>9} {'Case p95':>9} {'Person p50':>11} {'Person p95':>11} {'RSS MiB':>8} {'Assets':>7}")
+    for name, result in results.items():
+        rss = f"{result['rss']:8.1f}" if result["rss"] is not None else f"{'n/a':>8}"
+        print(f"{name:<12} {result['startup'] * 1000:8.0f} {result['login'] * 1000:8.0f} "
+              f"{result['case_p50'] * 1000:9.1f} {result['case_p95'] * 1000:9.1f} "
+              f"{result['person_p50'] * 1000:11.1f} {result['person_p95'] * 1000:11.1f} {rss} {result['assets']:>7}")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:])))
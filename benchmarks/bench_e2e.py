@@ -0,0 +1,169 @@
+"""End to end benchmark of the robot against local stand-ins for eFlyt, Graph and OpenOrchestrator.
+Requests with generated rows are put in a fake mailbox, and the robot is run through linear_framework.main,
+or through initialize and process directly, with the HTTP lookup backend against a fake eFlyt.
+Each run happens in a fresh process so peak memory isn't shared between runs.
+
+The throttle pacing eFlyt requests is turned off unless --throttle is given, since the fake eFlyt doesn't slow down under load.
+
+Usage: python -m benchmarks.bench_e2e [row count ...] [--entry main|process] [--emails N] [--latency SECONDS] [--throttle]
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+import tracemalloc
+import traceback
+from contextlib import ExitStack
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+import itk_dev_event_log
+from openpyxl import load_workbook
+from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
+
+from benchmarks.fake_eflyt import FakeEflyt, FakeEflytServer, USERNAME, PASSWORD, generate_cases
+from benchmarks.fake_graph import FakeMailbox, GRAPH_PASSWORD
+from benchmarks.fake_orchestrator import FakeOrchestratorConnection
+from robot_framework import config, initialize, linear_framework, process, timing
+from robot_framework.exceptions import error_screenshot
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# The stages whose latency is printed, in order
+STAGES = ("eflyt_login", "open_case", "grid_scan", "person_lookup", "queue_write", "queue_read", "queue_status", "write_excel", "smtp",
+          "time_to_first_result")
+
+
+def generate_requests(mailbox: FakeMailbox, row_count: int, email_count: int) -> dict[str, list]:
+    """Add requests with row_count rows in total, spread over email_count emails, to a mailbox.
+    Each case has two persons who are both in the input.
+
+    Returns:
+        The generated cases served by the fake eFlyt.
+    """
+    cases = generate_cases((row_count + 1) // 2)
+    rows = [(case, person.cpr, person.name) for case, persons in cases.items() for person in persons][:row_count]
+    per_email = -(-len(rows) // email_count)
+    for i in range(email_count):
+        mailbox.add_request(f"requester{i}@aarhus.dk", rows[i * per_email:(i + 1) * per_email])
+    return cases
+
+
+# pylint: disable-next=too-many-arguments, too-many-positional-arguments
+def _measure(entry: str, row_count: int, email_count: int, latency: float, throttled: bool, results: multiprocessing.Queue):
+    """Run the robot in this process and report its time, stage latencies and peak memory,
+    or the traceback if the run failed.
+    """
+    try:
+        results.put(_run(entry, row_count, email_count, latency, throttled))
+    except Exception:  # pylint: disable=broad-exception-caught
+        results.put(traceback.format_exc())
+
+
+def _run(entry: str, row_count: int, email_count: int, latency: float, throttled: bool) -> tuple[float, float, dict, int]:
+    """Run the robot and measure it.
+    Peak memory is the peak RSS where available, otherwise the peak memory allocated by Python,
+    which is traced at a cost in speed.
+
+    Returns:
+        The seconds taken, the peak memory in MiB, the timing of each stage and the number of requests to eFlyt.
+    """
+    if resource is None:
+        tracemalloc.start()
+
+    mailbox = FakeMailbox()
+    cases = generate_requests(mailbox, row_count, email_count)
+    connection = FakeOrchestratorConnection(
+        process_name="Benchmark",
+        process_arguments=json.dumps({"return_email": "robot@aarhus.dk"}),
+        constants={"Event Log": "", config.ERROR_EMAIL: "robot@aarhus.dk"},
+        credentials={config.EFLYT_LOGIN: (USERNAME, PASSWORD), config.GRAPH_API: ("robot@aarhus.dk", GRAPH_PASSWORD)}
+    )
+
+    with ExitStack() as stack:
+        server = stack.enter_context(FakeEflytServer(FakeEflyt(cases, latency)))
+        folder = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        stack.enter_context(mailbox.patch())
+        for name, value in (("LOOKUP_BACKEND", "http"), ("EFLYT_URL", server.url), ("TIMING_ENABLED", True), ("THROTTLE_ENABLED", throttled),
+                            ("PHONE_CACHE_PATH", str(folder / "phone_cache.db")), ("CHECKPOINT_FOLDER", str(folder / "checkpoints")),
+                            ("SESSION_STORE_PATH", str(folder / "eflyt_sessions.txt")),
+                            ("TIMING_REPORT_FOLDER", str(folder / "reports"))):
+            stack.enter_context(mock.patch.object(config, name, value))
+        stack.enter_context(mock.patch.object(itk_dev_event_log, "setup_logging"))
+        stack.enter_context(mock.patch.object(itk_dev_event_log, "emit"))
+        stack.enter_context(mock.patch.object(error_screenshot, "send_error_screenshot"))
+        stack.enter_context(mock.patch.object(OrchestratorConnection, "create_connection_from_args", lambda: connection))
+        stack.enter_context(mock.patch.object(sys, "excepthook", sys.excepthook))
+
+        timing.reset()
+        start = time.perf_counter()
+        if entry == "main":
+            linear_framework.main()
+        else:
+            email_inputs = initialize.initialize(None, connection)
+            process.process(email_inputs, None, connection)
+        seconds = time.perf_counter() - start
+        report = timing.report()
+
+    errors = [message for level, message in connection.logs if level == "error"]
+    if errors:
+        raise RuntimeError(f"The robot failed:\n{errors[0]}")
+    # Partial results are sent along the way, while the full results are checked
+    results = [email for email in mailbox.sent if "delresultat" not in email["subject"]]
+    sent_rows = sum(sum(1 for _ in load_workbook(BytesIO(data), read_only=True).active.iter_rows(min_row=2))
+                    for email in results for data in email["attachments"].values())
+    if len(results) != email_count or sent_rows != row_count:
+        raise RuntimeError(f"Expected {email_count} emails with {row_count} rows, got {len(results)} emails with {sent_rows} rows.")
+
+    if resource is None:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+    else:
+        # ru_maxrss is in KiB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    return seconds, peak, report["stages"], server.eflyt.request_count
+
+
+def main(*args: str):
+    """Run the robot at each row count and print a table of the results and the latency of each stage."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_e2e", description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("row_counts", nargs="*", type=int, default=[100, 1_000, 10_000])
+    parser.add_argument("--entry", choices=("main", "process"), default="main", help="Run through linear_framework.main or initialize and process.")
+    parser.add_argument("--emails", type=int, default=2, help="The number of request emails the rows are spread over.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds the fake eFlyt waits before answering each request.")
+    parser.add_argument("--throttle", action="store_true", help="Pace the eFlyt requests with the throttle set up in config.")
+    arguments = parser.parse_args(args)
+
+    results = multiprocessing.Queue()
+    peak_name = "Peak RSS MiB" if resource else "Peak Python MiB"
+    print(f"Entry: {arguments.entry}, sessions: {config.LOOKUP_SESSION_COUNT}, eFlyt latency: {arguments.latency * 1000:.0f} ms, throttle: {'on' if arguments.throttle else 'off'}")
+    print(f"{'Rows':>8} {'Seconds':>8} {'Rows/s':>8} {peak_name:>16} {'Requests':>9}")
+    stage_tables = []
+    for row_count in arguments.row_counts:
+        worker = multiprocessing.Process(target=_measure, args=(arguments.entry, row_count, arguments.emails, arguments.latency, arguments.throttle, results))
+        worker.start()
+        result = results.get()
+        worker.join()
+        if isinstance(result, str):
+            raise RuntimeError(f"The run with {row_count} rows failed:\n{result}")
+        seconds, peak, stages, request_count = result
+        print(f"{row_count:>8} {seconds:8.2f} {row_count / seconds:8.1f} {peak:16.1f} {request_count:>9}")
+        stage_tables.append((row_count, stages))
+
+    for row_count, stages in stage_tables:
+        print(f"\nStage latency in ms at {row_count} rows")
+        print(f"{'Stage':<20} {'Count':>7} {'p50':>8} {'p95':>8} {'Max':>8}")
+        for name in STAGES:
+            if name in stages:
+                stage = stages[name]
+                print(f"{name:<20} {stage['count']:>7} {stage['p50'] * 1000:8.2f} {stage['p95'] * 1000:8.2f} {stage['max'] * 1000:8.2f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
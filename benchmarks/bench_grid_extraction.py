@@ -0,0 +1,54 @@
+"""Micro-benchmark of reading the moving persons table and phone number labels from an eFlyt case page,
+comparing the single script call against reading element by element.
+The page is a static copy in benchmarks/pages, so no eFlyt access is needed. Requires Chrome.
+
+Usage: python -m benchmarks.bench_grid_extraction [iterations]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from selenium import webdriver
+
+from robot_framework import config, process
+
+CASE_PAGE = Path(__file__).parent / "pages" / "case.html"
+
+
+def _time(function: Callable, iterations: int) -> float:
+    """Run a function a number of times and return the mean time in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main(iterations: int = 50):
+    """Open the static case page and time each way of reading it."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    browser = webdriver.Chrome(options=options)
+    try:
+        browser.get(CASE_PAGE.as_uri())
+
+        config.GRID_EXTRACTION_MODE = "script"
+        assert process._get_moving_persons(browser) == process._get_moving_persons_by_element(browser)  # pylint: disable=protected-access
+
+        results = {
+            "Grid, script": _time(lambda: process._get_moving_persons(browser), iterations),  # pylint: disable=protected-access
+            "Grid, element": _time(lambda: process._get_moving_persons_by_element(browser), iterations),  # pylint: disable=protected-access
+            "Labels, script": _time(lambda: browser.execute_script(process._READ_LABELS_SCRIPT, config.PHONE_NUMBER_LABEL_ID, config.MOBILE_NUMBER_LABEL_ID), iterations),  # pylint: disable=protected-access
+            "Labels, element": _time(lambda: process._get_phone_number_labels_by_element(browser), iterations),  # pylint: disable=protected-access
+        }
+    finally:
+        browser.quit()
+
+    print(f"Mean of {iterations} iterations:")
+    for name, milliseconds in results.items():
+        print(f"{name:<16} {milliseconds:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,96 @@
+"""Benchmark of the data of queue elements, comparing the positional payload from robot_framework.payload
+against the JSON objects encrypted one at a time with crypto_util as it was done before.
+Reports the mean size of an element's data and how many elements are encoded and decoded per second,
+taking the best of a few rounds. Elements written as json are also read through payload.decode,
+which is how the elements already in the queue are read.
+
+Usage: python -m benchmarks.bench_payload [row count]
+"""
+
+import json
+import statistics
+import sys
+import time
+from typing import Callable
+
+from OpenOrchestrator.common import crypto_util
+
+from benchmarks.fake_eflyt import generate_cases
+from robot_framework import payload
+from robot_framework.process import CprCaseRow
+
+
+def generate_rows(row_count: int) -> list[CprCaseRow]:
+    """Generate fictive rows with the phone numbers of the fake eFlyt."""
+    cases = generate_cases((row_count + 1) // 2)
+    return [CprCaseRow(case, person.cpr, person.name, [number for number in (person.phone_number, person.mobile_number) if number])
+            for case, persons in cases.items() for person in persons][:row_count]
+
+
+def encode_json(row: CprCaseRow) -> str:
+    """Encode a row the way process did before the payload module."""
+    return crypto_util.encrypt_string(json.dumps({"case": row.case, "cpr": row.cpr, "name": row.name, "phone_numbers": row.phone_numbers}))
+
+
+def decode_json(data: str) -> CprCaseRow:
+    """Decode a row the way process did before the payload module."""
+    return CprCaseRow(**json.loads(crypto_util.decrypt_string(data)))
+
+
+def encode_payload(row: CprCaseRow) -> str:
+    """Encode a row the way process does."""
+    return payload.encode(row.case, row.cpr, row.name, row.phone_numbers)
+
+
+def decode_payload(data: str) -> CprCaseRow:
+    """Decode a row the way process does."""
+    return CprCaseRow(**payload.decode(data))
+
+
+FORMATS: dict[str, tuple[Callable[[CprCaseRow], str], Callable[[str], CprCaseRow]]] = {
+    "json": (encode_json, decode_json),
+    "json, read by payload": (encode_json, decode_payload),
+    "payload v1": (encode_payload, decode_payload),
+}
+
+# The number of times each format is run, keeping the fastest
+ROUNDS = 3
+
+
+def _best_rate(function: Callable, values: list) -> tuple[float, list]:
+    """Call a function on each value for a few rounds.
+
+    Returns:
+        The most calls per second of a round, and the results of the last round.
+    """
+    best = 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        results = [function(value) for value in values]
+        best = max(best, len(values) / (time.perf_counter() - start))
+    return best, results
+
+
+def main(row_count: int = 10_000):
+    """Encode and decode the rows in each format and print a table of the results."""
+    crypto_util.set_key(crypto_util.generate_key().decode())
+    rows = generate_rows(row_count)
+
+    results = {}
+    for name, (encode, decode) in FORMATS.items():
+        encode_rate, encoded = _best_rate(encode, rows)
+        decode_rate, _ = _best_rate(decode, encoded)
+        results[name] = (statistics.mean(len(data.encode()) for data in encoded), encode_rate, decode_rate)
+
+    print(f"{row_count} rows")
+    print(f"{'Format':<22} {'Bytes/element':>14} {'Encode/s':>10} {'Decode/s':>10}")
+    for name, (size, encode_rate, decode_rate) in results.items():
+        print(f"{name:<22} {size:14.1f} {encode_rate:10.0f} {decode_rate:10.0f}")
+    baseline_size = results["json"][0]
+    size = results["payload v1"][0]
+    print(f"\nPayload v1 saves {baseline_size - size:.1f} bytes ({1 - size / baseline_size:.0%}) per element, "
+          f"{(baseline_size - size) * 100_000 / 2**20:.1f} MiB per 100k elements")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
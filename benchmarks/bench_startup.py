@@ -0,0 +1,96 @@
+"""Benchmark of the startup of the robot on a scheduled run that finds no emails.
+Import time is read from python -X importtime on robot_framework.linear_framework, listing the slowest modules
+and which of the heavy dependencies were loaded. Cold start is the wall time of a fresh Python process running
+linear_framework.main against an empty mailbox and the fake OpenOrchestrator, including the interpreter startup.
+
+Usage: python -m benchmarks.bench_startup [run count]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+# Dependencies that are only needed when there is work to do
+HEAVY_MODULES = ("selenium", "openpyxl", "PIL", "pyodbc", "itk_dev_event_log", "bs4", "requests", "sqlalchemy", "cryptography")
+
+# Run in a fresh process: an empty mailbox and the fake OpenOrchestrator, then a run of the robot.
+COLD_START = """
+import json
+from unittest import mock
+from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
+from itk_dev_shared_components.graph import authentication, mail
+from benchmarks.fake_graph import GRAPH_PASSWORD
+from benchmarks.fake_orchestrator import FakeOrchestratorConnection
+from robot_framework import config, linear_framework
+
+connection = FakeOrchestratorConnection(
+    process_name="Benchmark",
+    process_arguments=json.dumps({"return_email": "robot@aarhus.dk"}),
+    constants={config.ERROR_EMAIL: "robot@aarhus.dk"},
+    credentials={config.GRAPH_API: ("robot@aarhus.dk", GRAPH_PASSWORD)}
+)
+with mock.patch.object(OrchestratorConnection, "create_connection_from_args", lambda: connection), \\
+        mock.patch.object(authentication, "authorize_by_username_password"), \\
+        mock.patch.object(mail, "get_emails_from_folder", return_value=()):
+    linear_framework.main()
+assert connection.logs[-1][1] == "No emails found. Stopping.", connection.logs
+"""
+
+
+def import_times(module: str) -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Import a module in a fresh process with -X importtime.
+
+    Returns:
+        The import time in seconds of the module and its packages, the cumulative time and name of each module imported directly
+        by the module or its packages, slowest first, and the heavy modules that were loaded.
+    """
+    check = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check], capture_output=True, text=True, check=True)
+
+    total = 0
+    direct = []
+    for line in result.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # The header line, or other output
+        seconds = int(parts[1]) / 1_000_000
+        # The name is indented by two spaces for each level it's nested in
+        name = parts[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0 and name.split(".")[0] == module.split(".")[0]:
+            total += seconds
+        elif depth == 1:
+            direct.append((seconds, name.strip()))
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total, sorted(direct, reverse=True), loaded
+
+
+def cold_start(code: str) -> float:
+    """Run code in a fresh process.
+
+    Returns:
+        The wall time in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def main(run_count: int = 5):
+    """Print the import time of the robot, the slowest imports, and the median cold start time."""
+    total, modules, loaded = import_times("robot_framework.linear_framework")
+    print(f"Import of robot_framework.linear_framework: {total * 1000:.0f} ms")
+    print(f"{'Slowest direct imports':<55} {'ms':>8}")
+    for seconds, name in modules[:10]:
+        print(f"{name:<55} {seconds * 1000:8.1f}")
+    print(f"Heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    baseline = statistics.median(cold_start("pass") for _ in range(run_count))
+    times = [cold_start(COLD_START) for _ in range(run_count)]
+    print(f"\nCold start of a run without emails, median of {run_count}: {statistics.median(times) * 1000:.0f} ms "
+          f"(min {min(times) * 1000:.0f} ms, bare interpreter {baseline * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,126 @@
+"""Benchmark of the adaptive throttle from robot_framework.throttle against a simulated eFlyt that degrades under load.
+The simulated eFlyt handles a fixed number of requests at once. Requests beyond that wait their turn, and the more
+requests are waiting the slower each request is handled, like a server spending its time on the backlog.
+Once too many are waiting it answers with an error page instead, which takes the normal service time.
+Worker threads send requests as fast as they can, either unpaced or through a shared throttle,
+and the benchmark reports the successful requests per second, the error rate, the latency and the rate the throttle settled at.
+
+Usage: python -m benchmarks.bench_throttle [--workers N] [--seconds S] [--capacity N] [--service-time S] [--queue N]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+from robot_framework.throttle import Throttle
+
+
+class OverloadError(Exception):
+    """The error page of an overloaded eFlyt."""
+
+
+# pylint: disable-next=too-few-public-methods
+class SimulatedEflyt:
+    """A server handling capacity requests at once, with room for queue_size waiting requests.
+    Each waiting request adds the service time divided by the capacity to the time of the requests being handled.
+    """
+    def __init__(self, capacity: int, service_time: float, queue_size: int):
+        self._slots = threading.Semaphore(capacity)
+        self._capacity = capacity
+        self._service_time = service_time
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def request(self) -> None:
+        """Handle a request, raising OverloadError if too many requests are waiting."""
+        with self._lock:
+            overloaded = self._waiting >= self._queue_size
+            if not overloaded:
+                self._waiting += 1
+        if overloaded:
+            time.sleep(self._service_time)
+            raise OverloadError()
+
+        with self._slots:
+            with self._lock:
+                self._waiting -= 1
+                backlog = self._waiting
+            time.sleep(self._service_time * (1 + backlog / self._capacity))
+
+
+def run(eflyt: SimulatedEflyt, throttle: Throttle | None, workers: int, seconds: float) -> dict:
+    """Send requests from worker threads for a number of seconds.
+
+    Returns:
+        The successful requests per second, the share of failed requests, the p50 and p95 latency of the
+        successful requests and the rate of the throttle at the end.
+    """
+    latencies: list[float] = []
+    failures = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def work():
+        while time.monotonic() < stop_at:
+            try:
+                with throttle.request() if throttle else nullcontext():
+                    request_start = time.perf_counter()
+                    eflyt.request()
+            except OverloadError:
+                with lock:
+                    failures[0] += 1
+                # Like a lookup retrying the request
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - request_start)
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    total = len(latencies) + failures[0]
+    return {
+        "throughput": len(latencies) / seconds,
+        "errors": failures[0] / total if total else 0,
+        "p50": statistics.median(latencies) if latencies else 0,
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        "rate": throttle.rate if throttle else None,
+    }
+
+
+def main(*args: str):
+    """Run the workers unpaced and through the throttle, and print a table of the results."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_throttle", description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--workers", type=int, default=16, help="The number of worker threads sending requests.")
+    parser.add_argument("--seconds", type=float, default=20, help="How long each run lasts.")
+    parser.add_argument("--capacity", type=int, default=4, help="The number of requests the simulated eFlyt handles at once.")
+    parser.add_argument("--service-time", type=float, default=0.05, help="The seconds the simulated eFlyt takes per request.")
+    parser.add_argument("--queue", type=int, default=6, help="The number of waiting requests before the simulated eFlyt answers with errors.")
+    arguments = parser.parse_args(args)
+
+    capacity_rate = arguments.capacity / arguments.service_time
+    runs = {
+        "unpaced": None,
+        # Scaled to the simulated eFlyt, with the decrease factor from config
+        "throttle": Throttle(start_rate=capacity_rate / 2, min_rate=1, max_rate=capacity_rate * 4,
+                             target_latency=arguments.service_time * 2, increase=capacity_rate / 5),
+    }
+
+    print(f"{arguments.workers} workers for {arguments.seconds:.0f} s, simulated eFlyt handles {capacity_rate:.0f} requests/s")
+    print(f"{'Run':<10} {'OK/s':>8} {'Errors':>8} {'p50 ms':>8} {'p95 ms':>8} {'Rate/s':>8}")
+    for name, throttle in runs.items():
+        eflyt = SimulatedEflyt(arguments.capacity, arguments.service_time, arguments.queue)
+        result = run(eflyt, throttle, arguments.workers, arguments.seconds)
+        rate = f"{result['rate']:8.1f}" if result["rate"] is not None else f"{'n/a':>8}"
+        print(f"{name:<10} {result['throughput']:8.1f} {result['errors']:8.1%} {result['p50'] * 1000:8.1f} {result['p95'] * 1000:8.1f} {rate}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,101 @@
+"""Benchmark of writing the result sheet, comparing the StreamingExcelWriter used by process.compile_results
+against building the whole workbook in memory as it was done before.
+Each run happens in a fresh process so peak memory isn't shared between runs.
+
+Usage: python -m benchmarks.bench_write_excel [row count ...]
+"""
+
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from robot_framework import process
+from robot_framework.excel_writer import StreamingExcelWriter
+from robot_framework.process import CprCaseRow
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def generate_cases(row_count: int):
+    """Generate fictive result rows lazily."""
+    for i in range(row_count):
+        yield CprCaseRow(str(10000000 + i), f"0101{i % 100:02}-{i % 10000:04}", f"Person {i}", [f"86 {i % 100:02} 00 00", f"20 {i % 100:02} 00 00"])
+
+
+def write_excel_in_memory(cases) -> BytesIO:
+    """Write the sheet the way process did before streaming."""
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["Sagsnr.", "CPR", "Navn", "Telefonnumre"])
+    for cpr_case in cases:
+        sheet.append([cpr_case.case, cpr_case.cpr, cpr_case.name, process.convert_phone_number(cpr_case.phone_numbers)])
+
+    for col in sheet.columns:
+        sheet.column_dimensions[col[0].column_letter].width = max(len(str(cell.value)) for cell in col) + 2
+    for cell in sheet[1]:
+        cell.font = Font(bold=True)
+
+    file = BytesIO()
+    wb.save(file)
+    return file
+
+
+def write_excel_streaming(cases) -> BytesIO:
+    """Write the sheet with the StreamingExcelWriter, the way process.compile_results does."""
+    with StreamingExcelWriter(process.RESULT_HEADER) as writer:
+        for cpr_case in cases:
+            writer.append([cpr_case.case, cpr_case.cpr, cpr_case.name, process.convert_phone_number(cpr_case.phone_numbers)])
+        return writer.save()
+
+
+WRITERS = {
+    "in memory": write_excel_in_memory,
+    "streaming": write_excel_streaming,
+}
+
+
+def _measure(writer_name: str, row_count: int, results: multiprocessing.Queue):
+    """Run a writer in this process and report its time, peak memory and file size.
+    Peak memory is the peak RSS where available, otherwise the peak memory allocated by Python,
+    which is traced at a cost in speed.
+    """
+    if resource is None:
+        tracemalloc.start()
+    start = time.perf_counter()
+    file = WRITERS[writer_name](generate_cases(row_count))
+    seconds = time.perf_counter() - start
+
+    if resource is None:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+    else:
+        # ru_maxrss is in KiB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    results.put((seconds, peak, len(file.getvalue()) / 2**20))
+
+
+def main(*row_counts: int):
+    """Run each writer at each row count and print a table of the results."""
+    row_counts = row_counts or (1_000, 10_000, 100_000)
+    results = multiprocessing.Queue()
+
+    peak_name = "Peak RSS MiB" if resource else "Peak Python MiB"
+    print(f"{'Writer':<10} {'Rows':>8} {'Seconds':>8} {peak_name:>16} {'File MiB':>9}")
+    for row_count in row_counts:
+        for writer_name in WRITERS:
+            worker = multiprocessing.Process(target=_measure, args=(writer_name, row_count, results))
+            worker.start()
+            seconds, peak, file_size = results.get()
+            worker.join()
+            print(f"{writer_name:<10} {row_count:>8} {seconds:8.2f} {peak:16.1f} {file_size:9.2f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
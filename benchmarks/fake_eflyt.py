@@ -0,0 +1,277 @@
+"""A local stand-in for eFlyt serving the static pages in benchmarks/pages.
+It supports the same login, case search and person postbacks as eFlyt, for generated cases,
+so the lookup backends can be run without access to eFlyt.
+The images, stylesheet and font referenced by the pages are served as filler of a set size,
+so the cost of loading them in a browser can be measured.
+
+Usage: python -m benchmarks.fake_eflyt [port] [case count]
+Then set EFLYT_URL in config to http://localhost:<port>.
+"""
+
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PAGES = Path(__file__).parent / "pages"
+USERNAME = "robot"
+PASSWORD = "password"
+
+_ROW_TEMPLATE = """
+        <tr>
+            <td><input type="checkbox"></td>
+            <td><a href="#"><img src="person.png" alt=""></a> <a id="ctl00_ContentPlaceHolder2_GridViewMovingPersons_ctl{index:02}_lnkCpr" href="javascript:__doPostBack('ctl00$ContentPlaceHolder2$GridViewMovingPersons$ctl{index:02}$lnkCpr','')">{cpr}</a></td>
+            <td>{name}</td><td>Medflytter</td>
+        </tr>"""
+_TABLE_PATTERN = re.compile(r"(<th scope=\"col\">Rolle</th>\s*</tr>).*?(\s*</table>)", re.DOTALL)
+_EVENT_TARGET_PATTERN = re.compile(r"\$ctl(\d+)\$lnkCpr")
+_ASSET_TYPES = {".png": "image/png", ".css": "text/css", ".woff2": "font/woff2"}
+# The stylesheet uses a font, so a browser loading the stylesheet also loads the font
+_STYLESHEET = "@font-face { font-family: eFlyt; src: url(/web/fonts/eflyt.woff2); }\nbody { font-family: eFlyt, sans-serif; }\n"
+
+
+@dataclass
+class Person:
+    """A moving person on a fake case."""
+    cpr: str
+    name: str
+    phone_number: str
+    mobile_number: str
+
+
+def generate_cases(case_count: int, persons_per_case: int = 2) -> dict[str, list[Person]]:
+    """Generate fictive cases with fictive persons.
+    The first person of each case only has a phone number, the rest have both a phone and mobile number.
+
+    Args:
+        case_count: The number of cases to generate.
+        persons_per_case: The number of persons on each case.
+
+    Returns:
+        A dict mapping case numbers to the persons on the case.
+    """
+    cases = {}
+    for case_index in range(case_count):
+        persons = []
+        for person_index in range(persons_per_case):
+            number = case_index * persons_per_case + person_index
+            persons.append(Person(
+                cpr=f"{number % 28 + 1:02}{number % 12 + 1:02}90-{number % 10000:04}",
+                name=f"Person {number}",
+                phone_number=f"86 {number % 100:02} {number // 100 % 100:02} 00",
+                mobile_number=f"20 {number % 100:02} {number // 100 % 100:02} 00" if person_index else ""
+            ))
+        cases[f"{10000000 + case_index}"] = persons
+    return cases
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeEflyt:
+    """The state of the fake eFlyt: the cases it knows and the open case of each logged in session."""
+    def __init__(self, cases: dict[str, list[Person]], latency: float = 0, asset_size: int = 20_000):
+        """
+        Args:
+            cases: The cases served, see generate_cases.
+            latency: The number of seconds to wait before answering each request.
+            asset_size: The size in bytes of each image, stylesheet and font served.
+        """
+        self.cases = cases
+        self.latency = latency
+        self.asset_size = asset_size
+        self.request_count = 0
+        self.asset_request_count = 0
+        self._sessions: dict[str, str | None] = {}
+        self._lock = threading.Lock()
+        self._pages = {name: (PAGES / f"{name}.html").read_text(encoding="utf-8") for name in ("login", "search", "case")}
+
+    def login(self, username: str, password: str) -> str | None:
+        """Create a session if the credentials are correct, and return its id."""
+        if (username, password) != (USERNAME, PASSWORD):
+            return None
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = None
+        return session_id
+
+    def is_logged_in(self, session_id: str | None) -> bool:
+        """Check if a session id belongs to a logged in session."""
+        with self._lock:
+            return session_id in self._sessions
+
+    def expire_sessions(self) -> None:
+        """Log out all sessions, like eFlyt does when sessions time out."""
+        with self._lock:
+            self._sessions.clear()
+
+    def open_case(self, session_id: str, case: str) -> str:
+        """Open a case in a session and return its page."""
+        with self._lock:
+            self._sessions[session_id] = case
+        return self.render_case(case, None)
+
+    def open_person(self, session_id: str, event_target: str) -> str:
+        """Open a person on the open case of a session and return the case page showing the person."""
+        with self._lock:
+            case = self._sessions[session_id]
+        match = _EVENT_TARGET_PATTERN.search(event_target)
+        return self.render_case(case, int(match.group(1)) - 2 if match else None)
+
+    def render_case(self, case: str, person_index: int | None) -> str:
+        """Render the case page for a case, with the person tab showing the person at the given index if any."""
+        persons = self.cases.get(case, [])
+        rows = "".join(_ROW_TEMPLATE.format(index=i + 2, cpr=person.cpr, name=person.name) for i, person in enumerate(persons))
+        page = _TABLE_PATTERN.sub(lambda match: match.group(1) + rows + match.group(2), self._pages["case"])
+        page = page.replace("12345678", case)
+
+        person = persons[person_index] if person_index is not None and person_index < len(persons) else None
+        for label, value in (("lblNavnTxt", person.name if person else ""),
+                             ("lblTlfnrTxt", person.phone_number if person else ""),
+                             ("lblMobilTxt", person.mobile_number if person else "")):
+            page = re.sub(rf'(id="ctl00_ContentPlaceHolder2_ptFanePerson_stcPersonTab1_{label}">)[^<]*', lambda match, value=value: match.group(1) + value, page)
+        return page
+
+    def page(self, name: str) -> str:
+        """Get one of the static pages."""
+        return self._pages[name]
+
+    def asset(self, path: str) -> tuple[str, bytes] | None:
+        """Get the content type and filler content of an image, stylesheet or font, or None if the path isn't one."""
+        content_type = _ASSET_TYPES.get(Path(path).suffix)
+        if content_type is None:
+            return None
+        if content_type == "text/css":
+            content = _STYLESHEET + "/*" + "-" * max(0, self.asset_size - len(_STYLESHEET) - 4) + "*/"
+            return content_type, content.encode()
+        return content_type, bytes(self.asset_size)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handles requests to the fake eFlyt. The FakeEflyt is set on the server."""
+    server: "FakeEflytServer"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the login and search pages."""
+        eflyt = self._before_request()
+        path = urlparse(self.path).path
+        asset = eflyt.asset(path)
+        if asset:
+            with self.server.lock:
+                eflyt.asset_request_count += 1
+            self._send(200, asset[1], asset[0])
+        elif path == "/":
+            self._send(200, eflyt.page("login"))
+        elif not eflyt.is_logged_in(self._session_id()):
+            self._redirect("/")
+        elif path == "/web/SearchResulteFlyt.aspx":
+            self._send(200, eflyt.page("search"))
+        else:
+            self._send(404, "Not found")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle the postbacks of the login, search and case pages."""
+        eflyt = self._before_request()
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length", 0))
+        fields = {name: values[0] for name, values in parse_qs(self.rfile.read(length).decode(), keep_blank_values=True).items()}
+
+        if "__VIEWSTATE" not in fields or "__EVENTVALIDATION" not in fields:
+            self._send(500, "Validation of viewstate failed")
+            return
+
+        if path == "/":
+            session_id = eflyt.login(fields.get("Login1$UserName"), fields.get("Login1$Password"))
+            if session_id:
+                self._redirect("/web/SearchResulteFlyt.aspx", f"ASP.NET_SessionId={session_id}; path=/")
+            else:
+                self._send(200, eflyt.page("login"))
+            return
+
+        session_id = self._session_id()
+        if not eflyt.is_logged_in(session_id):
+            self._redirect("/")
+        elif path == "/web/SearchResulteFlyt.aspx":
+            self._send(200, eflyt.open_case(session_id, fields.get("ctl00$ContentPlaceHolder1$SearchControl$txtSagNr", "")))
+        elif path == "/web/CaseView.aspx":
+            self._send(200, eflyt.open_person(session_id, fields.get("__EVENTTARGET", "")))
+        else:
+            self._send(404, "Not found")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the server quiet."""
+
+    def _before_request(self) -> FakeEflyt:
+        eflyt = self.server.eflyt
+        with self.server.lock:
+            eflyt.request_count += 1
+        if eflyt.latency:
+            time.sleep(eflyt.latency)
+        return eflyt
+
+    def _session_id(self) -> str | None:
+        cookies = self.headers.get("Cookie", "")
+        match = re.search(r"ASP\.NET_SessionId=(\w+)", cookies)
+        return match.group(1) if match else None
+
+    def _send(self, status: int, body: str | bytes, content_type: str = "text/html; charset=utf-8"):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location: str, cookie: str | None = None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FakeEflytServer(ThreadingHTTPServer):
+    """A threaded HTTP server serving a FakeEflyt on localhost.
+    Use it as a context manager to run it in a background thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, eflyt: FakeEflyt, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.eflyt = eflyt
+        self.lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """The root url of the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self) -> "FakeEflytServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self._thread.join()
+        super().__exit__(*args)
+
+
+def main(port: int = 8080, case_count: int = 100):
+    """Serve a fake eFlyt with generated cases until interrupted."""
+    with FakeEflytServer(FakeEflyt(generate_cases(case_count)), port) as server:
+        print(f"Serving fake eFlyt on {server.url} with cases {10000000} to {10000000 + case_count - 1}.")
+        print(f"Log in with {USERNAME}/{PASSWORD}. Press Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,116 @@
+"""An in-memory stand-in for the Graph mailbox the robot reads requests from and the SMTP server it answers through.
+Requests are emails with an input sheet attached, like the ones sent to the robot's mail folder.
+"""
+
+import json
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from io import BytesIO
+from unittest import mock
+
+from openpyxl import Workbook
+from itk_dev_shared_components.graph import authentication, mail
+from itk_dev_shared_components.smtp import smtp_util
+
+# The password of the fake Graph credential, holding the arguments of authentication.authorize_by_username_password
+GRAPH_PASSWORD = json.dumps({"password": "password", "client_id": "client", "tenant_id": "tenant"})
+
+
+def make_input_sheet(rows: list[tuple[str, str, str]]) -> BytesIO:
+    """Write an input sheet like the ones attached to requests.
+
+    Args:
+        rows: The case number, cpr number and name of each row.
+
+    Returns:
+        A BytesIO object containing the sheet.
+    """
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(["Sagsnr.", "CPR", "Navn"])
+    for row in rows:
+        sheet.append(list(row))
+    file = BytesIO()
+    wb.save(file)
+    return file
+
+
+class FakeMailbox:
+    """Holds request emails with their attachments, and keeps the emails sent over SMTP.
+    Use patch to make the graph mail and smtp functions use the mailbox.
+    """
+    def __init__(self):
+        self.emails: list[mail.Email] = []
+        self.sent: list[dict] = []
+        self._attachments: dict[str, list[tuple[mail.Attachment, bytes]]] = {}
+
+    def add_request(self, requester: str, rows: list[tuple[str, str, str]]) -> mail.Email:
+        """Add a request email with an input sheet.
+
+        Args:
+            requester: The email address of the requester, written in the body like the request form does.
+            rows: The rows of the input sheet, see make_input_sheet.
+
+        Returns:
+            The added email.
+        """
+        email = mail.Email(
+            user="itk-rpa@mkb.aarhus.dk",
+            id=uuid.uuid4().hex,
+            received_time=datetime.now().isoformat(),
+            sender="noreply@aarhus.dk",
+            receivers=["itk-rpa@mkb.aarhus.dk"],
+            subject="Eflyt udsøgning af telefonnumre",
+            body=f"Navn: Fake Requester\nE-mail: {requester}\n",
+            body_type="text",
+            has_attachments=True
+        )
+        data = make_input_sheet(rows).getvalue()
+        attachment = mail.Attachment(email, uuid.uuid4().hex, "input.xlsx", len(data))
+        self.emails.append(email)
+        self._attachments[email.id] = [(attachment, data)]
+        return email
+
+    def get_emails_from_folder(self, user: str, folder_path: str, graph_access, limit: int = 100) -> tuple[mail.Email]:  # pylint: disable=unused-argument
+        """Stand-in for mail.get_emails_from_folder."""
+        return tuple(email for email in self.emails if email.user == user)[:limit]
+
+    def list_email_attachments(self, email: mail.Email, graph_access) -> tuple[mail.Attachment]:  # pylint: disable=unused-argument
+        """Stand-in for mail.list_email_attachments."""
+        return tuple(attachment for attachment, _ in self._attachments.get(email.id, []))
+
+    def get_attachment_data(self, attachment: mail.Attachment, graph_access) -> BytesIO:  # pylint: disable=unused-argument
+        """Stand-in for mail.get_attachment_data."""
+        for candidate, data in self._attachments[attachment.email.id]:
+            if candidate.id == attachment.id:
+                return BytesIO(data)
+        raise ValueError(f"No attachment with id '{attachment.id}' was found.")
+
+    def delete_email(self, email: mail.Email, graph_access, *, permanent: bool = False) -> None:  # pylint: disable=unused-argument
+        """Stand-in for mail.delete_email."""
+        self.emails = [candidate for candidate in self.emails if candidate.id != email.id]
+        self._attachments.pop(email.id, None)
+
+    # pylint: disable-next=too-many-positional-arguments
+    def send_email(self, receiver: str | list[str], sender: str, subject: str, body: str, smtp_server: str, smtp_port: int,  # pylint: disable=unused-argument
+                   html_body: bool = False, attachments: list[smtp_util.EmailAttachment] | None = None) -> None:
+        """Stand-in for smtp_util.send_email. Attachments are read right away, since they may be closed after sending."""
+        self.sent.append({
+            "receiver": receiver,
+            "sender": sender,
+            "subject": subject,
+            "body": body,
+            "html_body": html_body,
+            "attachments": {attachment.file_name: attachment.file.getvalue() for attachment in attachments or []}
+        })
+
+    @contextmanager
+    def patch(self):
+        """Make the graph mail functions, graph authentication and smtp_util.send_email use this mailbox while inside the context."""
+        with ExitStack() as stack:
+            for name in ("get_emails_from_folder", "list_email_attachments", "get_attachment_data", "delete_email"):
+                stack.enter_context(mock.patch.object(mail, name, getattr(self, name)))
+            stack.enter_context(mock.patch.object(authentication, "authorize_by_username_password", lambda *args, **kwargs: None))
+            stack.enter_context(mock.patch.object(smtp_util, "send_email", self.send_email))
+            yield self
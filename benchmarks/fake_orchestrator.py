@@ -0,0 +1,153 @@
+"""An in-memory stand-in for OpenOrchestrator's OrchestratorConnection.
+It implements the log, constant, credential and queue methods used by the robot,
+so the robot can be run without an Orchestrator database.
+"""
+
+import threading
+import uuid
+from datetime import datetime
+
+from OpenOrchestrator.common import crypto_util
+from OpenOrchestrator.database.constants import Constant, Credential
+from OpenOrchestrator.database.queues import QueueElement, QueueStatus
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeOrchestratorConnection:
+    """Keeps logs, constants, credentials and queues in memory. Thread safe.
+    Queue elements are real QueueElement objects, ordered by creation like in the database.
+    """
+    def __init__(self, process_name: str = "Benchmark", process_arguments: str = "{}",
+                 constants: dict[str, str] | None = None, credentials: dict[str, tuple[str, str]] | None = None):
+        """The crypto key is set to a new random key, like OrchestratorConnection sets its own.
+
+        Args:
+            process_name: The name of the process.
+            process_arguments: The arguments of the process as given by the trigger.
+            constants: The values of the constants by name.
+            credentials: The username and password of the credentials by name.
+        """
+        self.process_name = process_name
+        self.process_arguments = process_arguments
+        self.trigger_id = str(uuid.uuid4())
+        self.job_id = str(uuid.uuid4())
+        crypto_util.set_key(crypto_util.generate_key().decode())
+
+        self.logs: list[tuple[str, str]] = []
+        self._constants = {name: Constant(name=name, value=value) for name, value in (constants or {}).items()}
+        self._credentials = {name: Credential(name=name, username=username, password=password)
+                             for name, (username, password) in (credentials or {}).items()}
+        self._queues: dict[str, list[QueueElement]] = {}
+        self._elements: dict[uuid.UUID, QueueElement] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"FakeOrchestratorConnection - Process name: {self.process_name}"
+
+    def log_trace(self, message: str) -> None:
+        """Keep a message with the level 'trace'."""
+        self.logs.append(("trace", message))
+
+    def log_info(self, message: str) -> None:
+        """Keep a message with the level 'info'."""
+        self.logs.append(("info", message))
+
+    def log_error(self, message: str) -> None:
+        """Keep a message with the level 'error'."""
+        self.logs.append(("error", message))
+
+    def get_constant(self, constant_name: str) -> Constant:
+        """Get a constant by name. Raises ValueError if it doesn't exist."""
+        if constant_name not in self._constants:
+            raise ValueError(f"No constant with name '{constant_name}' was found.")
+        return self._constants[constant_name]
+
+    def get_credential(self, credential_name: str) -> Credential:
+        """Get a credential by name. Raises ValueError if it doesn't exist."""
+        if credential_name not in self._credentials:
+            raise ValueError(f"No credential with name '{credential_name}' was found.")
+        return self._credentials[credential_name]
+
+    def update_constant(self, constant_name: str, new_value: str) -> None:
+        """Set the value of a constant."""
+        self.get_constant(constant_name).value = new_value
+
+    def update_credential(self, credential_name: str, new_username: str, new_password: str) -> None:
+        """Set the username and password of a credential."""
+        credential = self.get_credential(credential_name)
+        credential.username = new_username
+        credential.password = new_password
+
+    def create_queue_element(self, queue_name: str, reference: str | None = None, data: str | None = None, created_by: str | None = None) -> QueueElement:
+        """Add a new element to a queue."""
+        element = QueueElement(id=uuid.uuid4(), queue_name=queue_name, status=QueueStatus.NEW, data=data,
+                               reference=reference, created_date=datetime.now(), created_by=created_by)
+        with self._lock:
+            self._queues.setdefault(queue_name, []).append(element)
+            self._elements[element.id] = element
+        return element
+
+    def bulk_create_queue_elements(self, queue_name: str, references: tuple[str | None, ...], data: tuple[str | None, ...],
+                                   created_by: str | None = None) -> None:
+        """Add several new elements to a queue. Raises ValueError if references and data aren't the same length."""
+        if len(references) != len(data):
+            raise ValueError("references and data must have the same length.")
+        for reference, element_data in zip(references, data):
+            self.create_queue_element(queue_name, reference, element_data, created_by)
+
+    def get_next_queue_element(self, queue_name: str, reference: str | None = None, set_status: bool = True) -> QueueElement | None:
+        """Get the oldest new element of a queue, marking it as in progress if set_status is True."""
+        with self._lock:
+            for element in self._queues.get(queue_name, []):
+                if element.status == QueueStatus.NEW and (reference is None or element.reference == reference):
+                    if set_status:
+                        element.status = QueueStatus.IN_PROGRESS
+                        element.start_date = datetime.now()
+                    return element
+        return None
+
+    # pylint: disable-next=too-many-positional-arguments
+    def get_queue_elements(self, queue_name: str, reference: str | None = None, status: QueueStatus | None = None,
+                           offset: int = 0, limit: int = 100, from_date: datetime | None = None, to_date: datetime | None = None) -> tuple[QueueElement, ...]:
+        """Get a page of the elements of a queue matching the filters, ordered by creation."""
+        with self._lock:
+            elements = [
+                element for element in self._queues.get(queue_name, [])
+                if (reference is None or element.reference == reference)
+                and (status is None or element.status == status)
+                and (from_date is None or element.created_date >= from_date)
+                and (to_date is None or element.created_date <= to_date)
+            ]
+        return tuple(elements[offset:offset + limit])
+
+    def set_queue_element_status(self, element_id: str, status: QueueStatus, message: str | None = None) -> None:
+        """Set the status of a queue element, noting the start or end time like the database does."""
+        with self._lock:
+            element = self._find_queue_element(element_id)
+            element.status = status
+            if message is not None:
+                element.message = message
+            if status == QueueStatus.IN_PROGRESS:
+                element.start_date = datetime.now()
+            elif status in (QueueStatus.DONE, QueueStatus.FAILED):
+                element.end_date = datetime.now()
+
+    def delete_queue_element(self, element_id: str) -> None:
+        """Delete a queue element."""
+        with self._lock:
+            element = self._find_queue_element(element_id)
+            self._queues[element.queue_name].remove(element)
+            del self._elements[element.id]
+
+    def is_trigger_pausing(self) -> bool:
+        """The fake trigger never pauses."""
+        return False
+
+    def pause_my_trigger(self) -> None:
+        """The fake trigger has nothing to pause."""
+
+    def _find_queue_element(self, element_id: str) -> QueueElement:
+        element = self._elements.get(uuid.UUID(str(element_id)))
+        if element is None:
+            raise ValueError(f"No queue element with id '{element_id}' was found.")
+        return element
@@ -1,7 +1,10 @@
 """The main file of the robot which will install all requirements in
 a virtual environment and then start the actual process.
+The environment is only installed again when pyproject.toml or uv.lock has changed since the last install,
+which is tracked by a hash of the files kept in the virtual environment.
 """
 
+import hashlib
 import subprocess
 import os
 import sys
@@ -9,6 +12,35 @@ import sys
 script_directory = os.path.dirname(os.path.realpath(__file__))
 os.chdir(script_directory)
 
-subprocess.run("pip install --upgrade uv", check=True)
-command_args = ["uv", "run", "python", "-m", "robot_framework"] + sys.argv[1:]
+ENVIRONMENT_FILES = ("pyproject.toml", "uv.lock")
+ENVIRONMENT_MARKER = os.path.join(".venv", ".environment_hash")
+
+
+def environment_hash() -> str:
+    """Hash the files the environment is installed from."""
+    digest = hashlib.sha256()
+    for file_name in ENVIRONMENT_FILES:
+        if os.path.exists(file_name):
+            digest.update(file_name.encode())
+            with open(file_name, "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def environment_is_current() -> bool:
+    """Check if the environment was installed from the current files."""
+    if not os.path.exists(ENVIRONMENT_MARKER):
+        return False
+    with open(ENVIRONMENT_MARKER, encoding="utf-8") as file:
+        return file.read().strip() == environment_hash()
+
+
+if not environment_is_current():
+    subprocess.run("pip install --upgrade uv", check=True)
+    subprocess.run(["uv", "sync"], check=True)
+    # Hashed after syncing, since uv sync may have written uv.lock
+    with open(ENVIRONMENT_MARKER, "w", encoding="utf-8") as marker:
+        marker.write(environment_hash())
+
+command_args = ["uv", "run", "--no-sync", "python", "-m", "robot_framework"] + sys.argv[1:]
 subprocess.run(command_args, check=True)
@@ -0,0 +1,173 @@
+"""This module runs the lookups of a local xlsx or csv file from the command line, e.g. for a yearly campaign,
+instead of going through the mailbox. The rows are read and looked up in chunks, using the same dedup,
+queue and checkpoint bookkeeping as emails, and the results of each chunk are appended to a csv file.
+A job that stopped is continued by running it again with the same output file,
+skipping the rows already in the output.
+
+Usage: python -m robot_framework.backfill input.xlsx output.csv [--chunk-size N]
+The OpenOrchestrator connection string and crypto key are read from the arguments
+--connection-string and --crypto-key, or the environment variables OpenOrchestratorConnString and OpenOrchestratorKey.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+import itk_dev_event_log
+from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
+
+from robot_framework import config
+from robot_framework import eflyt_session
+from robot_framework import initialize
+from robot_framework import process
+from robot_framework import throttle
+from robot_framework import timing
+from robot_framework.checkpoint import Checkpoint
+from robot_framework.process import CprCaseRow
+from robot_framework.reference_index import ReferenceIndex
+
+OUTPUT_HEADER = ("Sagsnr.", "CPR", "Navn", "Telefonnumre")
+
+
+def read_input(path: Path) -> Iterator[CprCaseRow]:
+    """Read the rows of an input file one at a time, skipping the header row and invalid rows like initialize does.
+
+    Args:
+        path: An xlsx file, or a csv file separated by commas or semicolons.
+
+    Yields:
+        A CPR case for each valid row.
+    """
+    if path.suffix.lower() == ".xlsx":
+        with path.open("rb") as file:
+            yield from initialize.read_xlsx(file)
+        return
+
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        dialect = csv.Sniffer().sniff(file.read(4096), delimiters=",;")
+        file.seek(0)
+        reader = csv.reader(file, dialect)
+        next(reader, None)  # Skip header row
+        yield from initialize.read_rows(reader)
+
+
+def read_output(path: Path) -> set[str]:
+    """Read the cpr numbers already written to an output file.
+
+    Returns:
+        The cpr numbers, or an empty set if the file doesn't exist.
+    """
+    if not path.exists():
+        return set()
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        return {row[1] for row in reader if len(row) > 1}
+
+
+def run(input_path: Path, output_path: Path, orchestrator_connection: OrchestratorConnection,
+        chunk_size: int | None = None, report: Callable[[str], None] = print) -> int:
+    """Look up the rows of an input file and append the results to an output file, one chunk at a time.
+    Rows whose cpr number is already in the output file are skipped, so a job can be continued.
+    Rows with a cpr number already in the queue are skipped like in the email process, and not written to the output,
+    unless their phone numbers are in the local phone cache.
+
+    Args:
+        input_path: The xlsx or csv file to read, see read_input.
+        output_path: The csv file to append the results to.
+        orchestrator_connection: Connection used for the eFlyt credentials and the queue.
+        chunk_size: The number of rows looked up before their results are written. Defaults to config.BACKFILL_CHUNK_SIZE.
+        report: Called with a progress line after each chunk.
+
+    Returns:
+        The number of rows written to the output file by this run.
+    """
+    chunk_size = chunk_size or config.BACKFILL_CHUNK_SIZE
+    timing.reset()
+    throttle.reset()
+    event_log = orchestrator_connection.get_constant("Event Log")
+    itk_dev_event_log.setup_logging(event_log.value)
+
+    done = read_output(output_path)
+    total = sum(1 for _ in read_input(input_path))
+    read = 0
+    skipped = 0
+    written = 0
+    start = time.perf_counter()
+
+    with timing.span("reference_index"):
+        references = ReferenceIndex(orchestrator_connection, config.QUEUE_NAME)
+
+    rows = read_input(input_path)
+    with Checkpoint(f"backfill:{output_path.resolve()}") as checkpoint, \
+            eflyt_session.open_session_manager(orchestrator_connection) as sessions, \
+            process.open_lookup_pool(sessions) as pool, \
+            _open_output(output_path) as output:
+        writer = csv.writer(output)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            read += len(chunk)
+            to_look_up = [row for row in chunk if row.cpr not in done]
+            skipped += len(chunk) - len(to_look_up)
+
+            process.add_phonenumbers_to_queue_elements(to_look_up, pool, orchestrator_connection, checkpoint, references)
+            # Drains this chunk and any rows looked up but not written by an earlier run
+            element_ids: list[str] = []
+            for cpr_case in process.get_cases_from_queue(orchestrator_connection, checkpoint.request_id, element_ids):
+                writer.writerow([cpr_case.case, cpr_case.cpr, cpr_case.name, process.convert_phone_number(cpr_case.phone_numbers)])
+                written += 1
+            output.flush()
+            process.mark_queue_elements_done(orchestrator_connection, element_ids)
+
+            report(_progress(read, total, read - skipped, time.perf_counter() - start))
+
+    checkpoint.delete()
+    itk_dev_event_log.emit(orchestrator_connection.process_name, "Found phonenumbers", written)
+    timing.emit_report(orchestrator_connection.process_name)
+    throttle.emit_stats(orchestrator_connection.process_name)
+    return written
+
+
+def _open_output(path: Path):
+    """Open the output file for appending, writing the header if it's new."""
+    is_new = not path.exists() or path.stat().st_size == 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    output = path.open("a", newline="", encoding="utf-8-sig")
+    if is_new:
+        csv.writer(output).writerow(OUTPUT_HEADER)
+    return output
+
+
+def _progress(read: int, total: int, handled: int, seconds: float) -> str:
+    """Format a progress line with the rate and estimated time left of this run.
+    The rate only counts the rows handled by this run, not the rows skipped because they were already in the output.
+    """
+    rate = handled / seconds if seconds else 0
+    eta = f"{(total - read) / rate / 60:.1f} min" if rate else "unknown"
+    return f"{read}/{total} rows ({read / max(total, 1):.0%}), {rate:.1f} rows/s, {eta} left"
+
+
+def main(*args: str) -> None:
+    """Parse the command line arguments, connect to OpenOrchestrator and run the backfill."""
+    parser = argparse.ArgumentParser(prog="python -m robot_framework.backfill", description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("input", type=Path, help="The xlsx or csv file with the case, cpr and name columns.")
+    parser.add_argument("output", type=Path, help="The csv file the results are appended to. Run again with the same file to continue.")
+    parser.add_argument("--chunk-size", type=int, default=config.BACKFILL_CHUNK_SIZE, help="The number of rows looked up before their results are written.")
+    parser.add_argument("--connection-string", default=os.environ.get("OpenOrchestratorConnString"), help="The connection string of the OpenOrchestrator database.")
+    parser.add_argument("--crypto-key", default=os.environ.get("OpenOrchestratorKey"), help="The crypto key of OpenOrchestrator.")
+    parser.add_argument("--process-name", default="Eflyt Udsøgning Backfill", help="The process name used in logs.")
+    arguments = parser.parse_args(args)
+    if not arguments.connection_string or not arguments.crypto_key:
+        parser.error("The OpenOrchestrator connection string and crypto key are required.")
+
+    orchestrator_connection = OrchestratorConnection(arguments.process_name, arguments.connection_string, arguments.crypto_key, "{}", None, None)
+    written = run(arguments.input, arguments.output, orchestrator_connection, arguments.chunk_size)
+    print(f"Done. {written} rows written to {arguments.output}.")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
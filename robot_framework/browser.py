@@ -0,0 +1,84 @@
+"""This module contains the factory for the Chrome browsers used for lookups in eFlyt.
+The browser is set up by the BROWSER_* values in config. By default it's set up like eflyt_login.login does.
+Running headless, a smaller window, blocking images, stylesheets and fonts, the eager page load strategy
+and extra Chrome arguments can be turned on there once measured against eFlyt with benchmarks/bench_browser.py.
+"""
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from itk_dev_shared_components.eflyt.eflyt_login import ResilientBrowser
+from robot_framework import config
+from robot_framework import throttle
+
+
+def create_browser() -> ResilientBrowser:
+    """Start a Chrome browser set up by the BROWSER_* values in config, without logging in.
+
+    Returns:
+        The browser.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--disable-search-engine-choice-screen")
+    if config.BROWSER_HEADLESS:
+        options.add_argument("--headless=new")
+    if config.BROWSER_WINDOW_SIZE:
+        options.add_argument(f"--window-size={config.BROWSER_WINDOW_SIZE}")
+    for argument in config.BROWSER_ARGUMENTS:
+        options.add_argument(argument)
+    options.page_load_strategy = config.BROWSER_PAGE_LOAD_STRATEGY
+
+    browser = ResilientBrowser(options=options)
+    try:
+        if not config.BROWSER_WINDOW_SIZE:
+            browser.maximize_window()
+        browser.implicitly_wait(2)
+        if config.BROWSER_BLOCKED_URLS:
+            browser.execute_cdp_cmd("Network.enable", {})
+            browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(config.BROWSER_BLOCKED_URLS)})
+    except Exception:
+        browser.quit()
+        raise
+    return browser
+
+
+def login(username: str, password: str) -> ResilientBrowser:
+    """Start a browser and log into eFlyt.
+    Used instead of eflyt_login.login, which starts a full browser window.
+
+    Args:
+        username: Username for login.
+        password: Password for login.
+
+    Returns:
+        The logged in browser.
+    """
+    browser = create_browser()
+    try:
+        login_browser(browser, username, password)
+    except Exception:
+        browser.quit()
+        raise
+    return browser
+
+
+def login_browser(browser: webdriver.Chrome, username: str, password: str) -> None:
+    """Log an open browser into eFlyt, the same way eflyt_login.login does.
+    This is also used to log in again when a session has expired.
+
+    Args:
+        browser: The browser to log in.
+        username: Username for login.
+        password: Password for login.
+
+    Raises:
+        RuntimeError: If the login failed.
+    """
+    with throttle.request():
+        browser.get(config.EFLYT_URL)
+    browser.find_element(By.ID, "Login1_UserName").send_keys(username)
+    browser.find_element(By.ID, "Login1_Password").send_keys(password)
+    with throttle.request():
+        browser.find_element(By.ID, "Login1_LoginImageButton").click()
+    if not browser.find_elements(By.ID, "ctl00_imgLogo"):
+        raise RuntimeError("Login failed")
@@ -0,0 +1,62 @@
+"""This module contains a durable record of the rows already handled for a request,
+so a retry of the process can continue where the last try stopped.
+"""
+
+import hashlib
+from pathlib import Path
+
+from robot_framework import config
+
+
+class Checkpoint:
+    """An append-only file of the references of the rows handled for a request.
+    The file is named by a hash of the request's key, e.g. the id of the email, which is also the request_id.
+    Use it as a context manager to make sure the file is closed again.
+    """
+    def __init__(self, key: str, folder: str | None = None):
+        """
+        Args:
+            key: A key identifying the request.
+            folder: The folder to keep checkpoint files in. Defaults to config.CHECKPOINT_FOLDER.
+        """
+        folder = folder or config.CHECKPOINT_FOLDER
+        Path(folder).mkdir(parents=True, exist_ok=True)
+        # Short enough to tag the queue elements of the request with, unlike the id of an email
+        self.request_id = hashlib.sha256(key.encode()).hexdigest()
+        self.path = Path(folder) / f"{self.request_id}.txt"
+
+        self.references: set[str] = set()
+        if self.path.exists():
+            self.references.update(self.path.read_text(encoding="utf-8").split())
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __contains__(self, reference: str) -> bool:
+        return reference in self.references
+
+    def __len__(self) -> int:
+        return len(self.references)
+
+    def add(self, reference: str) -> None:
+        """Record a row as handled. The file is flushed so the record survives a crash.
+
+        Args:
+            reference: The reference of the row.
+        """
+        self.references.add(reference)
+        self._file.write(reference + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the checkpoint file, keeping it for a later retry."""
+        self._file.close()
+
+    def delete(self) -> None:
+        """Close and delete the checkpoint file once the request is done."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -11,6 +11,11 @@ FAIL_ROBOT_ON_TOO_MANY_ERRORS = True
 SMTP_SERVER = "smtp.aarhuskommune.local"
 SMTP_PORT = 25
 SCREENSHOT_SENDER = "robot@friend.dk"
+# Error screenshots are downscaled to fit within this width and height in pixels,
+# and compressed in this format ("JPEG" or "WEBP") and quality from 1 to 100.
+SCREENSHOT_MAX_SIZE = (1280, 1024)
+SCREENSHOT_FORMAT = "JPEG"
+SCREENSHOT_QUALITY = 70
 
 # Constant/Credential names
 ERROR_EMAIL = "Error Email"
@@ -21,6 +26,101 @@ GRAPH_API = "Graph API"
 MAIL_SOURCE_FOLDER = "Indbakke/Eflyt udsøgning af telefonnumre"
 EMAIL_STATUS_SENDER = "itk-rpa@mkb.aarhus.dk"
 EMAIL_ATTACHMENT = "eflyt_telefonnumre.xlsx"
+# Whether every email in the source folder is handled in one run, or only the first.
+PROCESS_ALL_EMAILS = True
+# Whether the rows found are sent in partial results while a request is looked up, before the full result is sent.
+# A partial result is sent after this many new rows, or this many seconds after the last one, whichever comes first.
+PARTIAL_RESULTS = True
+PARTIAL_RESULT_ROWS = 500
+PARTIAL_RESULT_INTERVAL = 30 * 60
+# The largest attachment sent in one email in bytes. Larger results are split into several workbooks sent in separate emails.
+# If OVERSIZE_FORMAT is "csv.gz" they are sent as a gzipped csv file instead when that fits, otherwise "split".
+ATTACHMENT_MAX_SIZE = 15 * 2**20
+OVERSIZE_FORMAT = "split"
+
+# eFlyt
+EFLYT_URL = "https://notuskommunal.scandihealth.net"
+MOVING_PERSONS_TABLE_ID = "ctl00_ContentPlaceHolder2_GridViewMovingPersons"
+PHONE_NUMBER_LABEL_ID = "ctl00_ContentPlaceHolder2_ptFanePerson_stcPersonTab1_lblTlfnrTxt"
+MOBILE_NUMBER_LABEL_ID = "ctl00_ContentPlaceHolder2_ptFanePerson_stcPersonTab1_lblMobilTxt"
+
+# Lookups
+# Which backend is used for lookups in eFlyt.
+# "selenium" drives a Chrome browser, "http" posts the eFlyt forms directly over HTTP.
+LOOKUP_BACKEND = "selenium"
+# The number of eFlyt browser sessions running lookups in parallel.
+LOOKUP_SESSION_COUNT = 4
+# The number of times a lookup is retried on its own on a transient error, like a stale element or a timeout.
+LOOKUP_RETRY_COUNT = 2
+# How the moving persons table and phone number labels are read.
+# "script" reads them in a single javascript call, "element" reads them one element at a time.
+GRID_EXTRACTION_MODE = "script"
+# The number of pooled connections and the request timeout in seconds of each HTTP session.
+HTTP_POOL_SIZE = 4
+HTTP_TIMEOUT = 30
+
+# Throttle
+# Whether the requests of all sessions to eFlyt are paced by a shared rate in requests per second,
+# the rate a run starts at, and the lowest and highest rate it can go to.
+THROTTLE_ENABLED = True
+THROTTLE_START_RATE = 5
+THROTTLE_MIN_RATE = 0.5
+THROTTLE_MAX_RATE = 30
+# A request slower than this many seconds counts as eFlyt slowing down, like a failed request does.
+THROTTLE_TARGET_LATENCY = 3.0
+# The requests per second the rate grows by each second while requests go well,
+# and the factor it's multiplied by when a request is slow or fails.
+THROTTLE_INCREASE = 1
+THROTTLE_DECREASE = 0.7
+# The most requests sent at once after a pause.
+THROTTLE_BURST = 4
+
+# Browser
+# Whether Chrome runs without a window, and the size of its window, e.g. "1280,1024". None maximizes the window.
+BROWSER_HEADLESS = False
+BROWSER_WINDOW_SIZE = None
+# When a page counts as loaded. "eager" hands back control when the DOM is ready, "normal" waits for everything on the page.
+BROWSER_PAGE_LOAD_STRATEGY = "normal"
+# URL patterns Chrome doesn't load, e.g. "*.png" or "*.css". Scripts are needed for postbacks and mustn't be blocked.
+BROWSER_BLOCKED_URLS = ()
+# Extra Chrome arguments, e.g. "--disable-extensions".
+# The browser matches eflyt_login.login by default. Measure any change against eFlyt with benchmarks/bench_browser.py first.
+BROWSER_ARGUMENTS = ()
+
+# eFlyt sessions
+# Whether logged in eFlyt sessions are kept encrypted on disk between runs, the file they are kept in,
+# and the number of seconds after which kept sessions are no longer tried.
+# Off by default, since the file holds logged in eFlyt cookies. Sessions are still reused between tries of a run.
+SESSION_PERSIST = False
+SESSION_STORE_PATH = "cache/eflyt_sessions.txt"
+SESSION_MAX_AGE = 30 * 60
+# The number of seconds a session may sit unused before it's refreshed so it doesn't expire. 0 disables the refresh.
+SESSION_KEEP_ALIVE_INTERVAL = 5 * 60
+
+# Phone cache
+# The local file caching phone numbers between runs, how many seconds an entry is valid and the maximum number of entries.
+PHONE_CACHE_PATH = "cache/phone_cache.db"
+PHONE_CACHE_TTL = 30 * 24 * 60 * 60
+PHONE_CACHE_MAX_SIZE = 100_000
+
+# Checkpoints
+# The local folder keeping a record of the rows handled for each email, so a retry continues where it stopped.
+CHECKPOINT_FOLDER = "checkpoints"
+
+# Backfill
+# The number of rows of a backfill looked up before their results are written to the output file.
+BACKFILL_CHUNK_SIZE = 500
+
+# Timing
+# Whether the stages of a run are timed, and the local folder the json timing reports are written to.
+TIMING_ENABLED = True
+TIMING_REPORT_FOLDER = "reports"
 
 # Orchestrator
 QUEUE_NAME = "Eflyt Udsøgning af Telefonnumre"
+# The number of queue elements read per request when reading the queue in pages.
+QUEUE_PAGE_SIZE = 1000
+# The number of queue elements created per request. Rows are written and checkpointed when a batch is full.
+QUEUE_WRITE_BATCH_SIZE = 100
+# The number of seconds before the index of existing queue references is refreshed.
+REFERENCE_INDEX_REFRESH_INTERVAL = 600
@@ -0,0 +1,128 @@
+"""This module prepares result sheets for sending by email.
+Results larger than config.ATTACHMENT_MAX_SIZE are split into several workbooks, each sent in its own email,
+or sent as a gzipped csv file if config.OVERSIZE_FORMAT is "csv.gz" and that fits.
+While a large request is looked up, PartialResults sends the new rows in parts so the requester
+doesn't have to wait for the whole request.
+"""
+
+import csv
+import gzip
+import io
+import time
+from pathlib import PurePath
+from typing import Any, Callable
+
+from itk_dev_shared_components.smtp.smtp_util import EmailAttachment
+
+from robot_framework import config
+from robot_framework.excel_writer import StreamingExcelWriter
+
+# The most times a result is split into more parts before giving up on fitting it under the size limit
+_MAX_SPLIT_TRIES = 5
+
+
+def fit_attachments(writer: StreamingExcelWriter, file_name: str) -> list[EmailAttachment]:
+    """Write the rows of a writer as attachments that each fit under config.ATTACHMENT_MAX_SIZE.
+
+    Args:
+        writer: The writer holding the rows.
+        file_name: The file name of the workbook. Parts are numbered, e.g. "name_del1af3.xlsx".
+
+    Returns:
+        One attachment, unless the rows had to be split into several workbooks.
+        Each attachment should be sent in its own email.
+    """
+    file = writer.save()
+    if _size(file) <= config.ATTACHMENT_MAX_SIZE:
+        return [EmailAttachment(file, file_name)]
+
+    if config.OVERSIZE_FORMAT == "csv.gz":
+        compressed = _write_csv_gzip(writer)
+        if _size(compressed) <= config.ATTACHMENT_MAX_SIZE:
+            return [EmailAttachment(compressed, f"{PurePath(file_name).stem}.csv.gz")]
+
+    part_count = -(-_size(file) // config.ATTACHMENT_MAX_SIZE)
+    for _ in range(_MAX_SPLIT_TRIES):
+        part_count = min(part_count, max(writer.row_count, 1))
+        parts = writer.save_parts(part_count)
+        if all(_size(part) <= config.ATTACHMENT_MAX_SIZE for part in parts) or part_count == writer.row_count:
+            break
+        part_count += 1
+
+    path = PurePath(file_name)
+    return [EmailAttachment(part, f"{path.stem}_del{i}af{len(parts)}{path.suffix}") for i, part in enumerate(parts, start=1)]
+
+
+# pylint: disable-next=too-many-instance-attributes
+class PartialResults:
+    """Collects the rows of a request as they are found, and sends them as a partial result
+    every config.PARTIAL_RESULT_ROWS rows or config.PARTIAL_RESULT_INTERVAL seconds, whichever comes first.
+    Each partial result only holds the rows found since the last one.
+    Use it as a context manager to make sure the rows are deleted again.
+    """
+    def __init__(self, header: list[str], send: Callable[[list[EmailAttachment], int], None], file_name: str, sent_count: int = 0):
+        """
+        Args:
+            header: The header of the result sheets.
+            send: Called with the attachments and number of each partial result to send it.
+            file_name: The file name of the partial result workbooks. They are numbered, e.g. "name_delresultat1.xlsx".
+            sent_count: The number of partial results already sent by an earlier try, so the numbering continues.
+        """
+        self._header = header
+        self._send = send
+        self._file_name = PurePath(file_name)
+        self._writer = StreamingExcelWriter(header)
+        self._sent_at = time.monotonic()
+        self.sent_count = sent_count
+        self.first_sent_at: float | None = None
+
+    def __enter__(self) -> "PartialResults":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def add(self, rows: list[list[Any]]) -> None:
+        """Add rows found, and send a partial result if one is due.
+
+        Args:
+            rows: The values of each row, as written to the result sheet.
+        """
+        for row in rows:
+            self._writer.append(row)
+        if self._writer.row_count >= config.PARTIAL_RESULT_ROWS or \
+                (self._writer.row_count and time.monotonic() - self._sent_at >= config.PARTIAL_RESULT_INTERVAL):
+            self.flush()
+
+    def flush(self) -> None:
+        """Send the rows added since the last partial result, if any."""
+        if not self._writer.row_count:
+            return
+        number = self.sent_count + 1
+        file_name = f"{self._file_name.stem}_delresultat{number}{self._file_name.suffix}"
+        self._send(fit_attachments(self._writer, file_name), number)
+        self.sent_count = number
+        self._writer.close()
+        self._writer = StreamingExcelWriter(self._header)
+        self._sent_at = time.monotonic()
+        if self.first_sent_at is None:
+            self.first_sent_at = self._sent_at
+
+    def close(self) -> None:
+        """Delete the rows not sent yet."""
+        self._writer.close()
+
+
+def _write_csv_gzip(writer: StreamingExcelWriter) -> io.BytesIO:
+    """Write the rows of a writer as a gzipped csv file, readable by Excel."""
+    file = io.BytesIO()
+    with gzip.GzipFile(fileobj=file, mode="wb") as compressed, \
+            io.TextIOWrapper(compressed, encoding="utf-8-sig", newline="") as text:
+        csv_writer = csv.writer(text, delimiter=";")
+        csv_writer.writerow(writer.header)
+        csv_writer.writerows(writer.iter_rows())
+    return io.BytesIO(file.getvalue())
+
+
+def _size(file: io.BytesIO) -> int:
+    return file.getbuffer().nbytes
@@ -0,0 +1,290 @@
+"""This module contains a lookup backend that reads eFlyt over plain HTTP instead of driving a browser.
+eFlyt is an ASP.NET WebForms application, so every action is a postback of the page's form
+including its __VIEWSTATE and __EVENTVALIDATION fields.
+Every request is paced by the shared throttle, and error responses count as failed requests.
+"""
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from robot_framework import config
+from robot_framework import throttle
+
+_VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_POSTBACK_PATTERN = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+
+
+@dataclass
+class _Node:
+    """An element in a parsed html page."""
+    tag: str
+    attrs: dict[str, str]
+    children: list["_Node | str"] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """The text of the element and all its children with whitespace collapsed."""
+        parts = [child if isinstance(child, str) else child.text for child in self.children]
+        return " ".join("".join(parts).split())
+
+    def iter(self, tag: str | None = None):
+        """Iterate over this element and all elements below it, optionally filtered by tag."""
+        if tag is None or self.tag == tag:
+            yield self
+        for child in self.children:
+            if isinstance(child, _Node):
+                yield from child.iter(tag)
+
+    def find_by_id(self, element_id: str) -> "_Node | None":
+        """Find the first element with the given id."""
+        return next((node for node in self.iter() if node.attrs.get("id") == element_id), None)
+
+    def find_children(self, tag: str) -> list["_Node"]:
+        """Find the direct children with the given tag."""
+        return [child for child in self.children if isinstance(child, _Node) and child.tag == tag]
+
+
+class _TreeBuilder(HTMLParser):
+    """Builds a tree of _Node from html, tolerating unclosed elements."""
+    def __init__(self):
+        super().__init__()
+        self.root = _Node("document", {})
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, {name: value or "" for name, value in attrs})
+        self._stack[-1].children.append(node)
+        if tag not in _VOID_ELEMENTS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._stack[-1].children.append(_Node(tag, {name: value or "" for name, value in attrs}))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+@dataclass
+class Page:
+    """A page returned by eFlyt."""
+    url: str
+    document: _Node
+
+    @classmethod
+    def parse(cls, url: str, html: str) -> "Page":
+        """Parse the html of a page.
+
+        Args:
+            url: The url the page was read from.
+            html: The html of the page.
+
+        Returns:
+            The parsed page.
+        """
+        builder = _TreeBuilder()
+        builder.feed(html)
+        builder.close()
+        return cls(url, builder.root)
+
+    def form_fields(self) -> dict[str, str]:
+        """Get the current values of the page's form, as they would be posted by a browser.
+        Buttons are left out, since only the clicked one is posted.
+        """
+        form = next(self.document.iter("form"))
+        fields = {}
+        for node in form.iter():
+            name = node.attrs.get("name")
+            if not name:
+                continue
+            if node.tag == "input":
+                input_type = node.attrs.get("type", "text").lower()
+                if input_type in ("submit", "image", "button", "reset", "file"):
+                    continue
+                if input_type in ("checkbox", "radio") and "checked" not in node.attrs:
+                    continue
+                fields[name] = node.attrs.get("value", "on" if input_type in ("checkbox", "radio") else "")
+            elif node.tag == "select":
+                options = list(node.iter("option"))
+                selected = next((option for option in options if "selected" in option.attrs), options[0] if options else None)
+                if selected is not None:
+                    fields[name] = selected.attrs.get("value", selected.text)
+            elif node.tag == "textarea":
+                fields[name] = node.text
+        return fields
+
+    def form_action(self) -> str:
+        """Get the absolute url the page's form posts to."""
+        form = next(self.document.iter("form"))
+        return urljoin(self.url, form.attrs.get("action", ""))
+
+    def label_text(self, element_id: str) -> str | None:
+        """Get the text of an element, or None if it doesn't exist."""
+        node = self.document.find_by_id(element_id)
+        return node.text if node else None
+
+
+@dataclass
+class PersonLink:
+    """A row in the moving persons table of a case, with the postback target of its cpr link."""
+    cpr: str
+    name: str
+    event_target: str
+    event_argument: str
+
+
+class EflytHttpSession:
+    """A logged in eFlyt session over HTTP. Not thread safe, use one session per thread."""
+    def __init__(self, base_url: str | None = None):
+        """
+        Args:
+            base_url: The root url of eFlyt. Defaults to config.EFLYT_URL.
+        """
+        self.base_url = base_url or config.EFLYT_URL
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.HTTP_POOL_SIZE)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._page: Page | None = None
+
+    def login(self, username: str, password: str) -> None:
+        """Log into eFlyt.
+
+        Args:
+            username: Username for login.
+            password: Password for login.
+
+        Raises:
+            RuntimeError: If the login failed.
+        """
+        page = self._get(urljoin(self.base_url, "/"))
+        fields = page.form_fields()
+        fields["Login1$UserName"] = username
+        fields["Login1$Password"] = password
+        fields["Login1$LoginImageButton.x"] = "0"
+        fields["Login1$LoginImageButton.y"] = "0"
+        page = self._post(page, fields)
+
+        if page.document.find_by_id("ctl00_imgLogo") is None:
+            raise RuntimeError("Login failed")
+
+    def open_case(self, case: str) -> None:
+        """Open a case by searching for its case number.
+
+        Args:
+            case: The case to open.
+
+        Raises:
+            RuntimeError: If the case couldn't be opened.
+        """
+        page = self._get(urljoin(self.base_url, "/web/SearchResulteFlyt.aspx"))
+        fields = page.form_fields()
+        fields["ctl00$ContentPlaceHolder1$SearchControl$txtSagNr"] = case
+        search_button = page.document.find_by_id("ctl00_ContentPlaceHolder1_SearchControl_btnSearch")
+        fields["ctl00$ContentPlaceHolder1$SearchControl$btnSearch"] = search_button.attrs.get("value", "") if search_button else ""
+        page = self._post(page, fields)
+
+        if page.document.find_by_id(config.MOVING_PERSONS_TABLE_ID) is None:
+            raise RuntimeError(f"Case {case} couldn't be opened")
+
+    def get_moving_persons(self) -> dict[str, PersonLink]:
+        """Read the moving persons table of the open case.
+
+        Returns:
+            A dict mapping each cpr number without dash to the person.
+        """
+        table = self._page.document.find_by_id(config.MOVING_PERSONS_TABLE_ID)
+        rows = list(table.iter("tr"))
+
+        moving_persons = {}
+        # Skip header row
+        for row in rows[1:]:
+            cells = row.find_children("td")
+            links = list(cells[1].iter("a"))
+            match = _POSTBACK_PATTERN.search(links[1].attrs.get("href", ""))
+            person = PersonLink(links[1].text, cells[2].text, *match.groups())
+            moving_persons[person.cpr.replace("-", "")] = person
+        return moving_persons
+
+    def get_phone_numbers(self, person: PersonLink) -> tuple[str | None, str | None]:
+        """Open a person from the moving persons table and read their phone numbers.
+
+        Args:
+            person: The person to open.
+
+        Returns:
+            The text of the phone and mobile number labels, or None if they don't exist.
+        """
+        fields = self._page.form_fields()
+        fields["__EVENTTARGET"] = person.event_target
+        fields["__EVENTARGUMENT"] = person.event_argument
+        page = self._post(self._page, fields)
+        return page.label_text(config.PHONE_NUMBER_LABEL_ID), page.label_text(config.MOBILE_NUMBER_LABEL_ID)
+
+    def is_logged_in(self) -> bool:
+        """Check if the session is still logged in by loading the search page.
+        eFlyt sends an expired session back to the login page.
+        """
+        page = self._get(urljoin(self.base_url, "/web/SearchResulteFlyt.aspx"))
+        return page.document.find_by_id("ctl00_imgLogo") is not None
+
+    def get_cookies(self) -> list[dict[str, str]]:
+        """Get the cookies of the session, e.g. to keep the login for later.
+
+        Returns:
+            The name, value, domain and path of each cookie.
+        """
+        return [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path} for cookie in self._session.cookies]
+
+    def add_cookies(self, cookies: list[dict[str, str]]) -> None:
+        """Add cookies to the session, e.g. to continue a login kept from an earlier session.
+
+        Args:
+            cookies: The cookies as returned by get_cookies.
+        """
+        for cookie in cookies:
+            self._session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+    def close(self) -> None:
+        """Close the pooled connections of the session."""
+        self._session.close()
+
+    def _get(self, url: str) -> Page:
+        with throttle.request():
+            response = self._session.get(url, timeout=config.HTTP_TIMEOUT)
+            response.raise_for_status()
+        self._page = Page.parse(response.url, response.text)
+        return self._page
+
+    def _post(self, page: Page, fields: dict[str, str]) -> Page:
+        with throttle.request():
+            response = self._session.post(page.form_action(), data=fields, timeout=config.HTTP_TIMEOUT)
+            response.raise_for_status()
+        self._page = Page.parse(response.url, response.text)
+        return self._page
+
+
+def login(username: str, password: str, base_url: str | None = None) -> EflytHttpSession:
+    """Log into eFlyt over HTTP.
+
+    Args:
+        username: Username for login.
+        password: Password for login.
+        base_url: The root url of eFlyt. Defaults to config.EFLYT_URL.
+
+    Returns:
+        A logged in session.
+    """
+    session = EflytHttpSession(base_url)
+    session.login(username, password)
+    return session
@@ -0,0 +1,370 @@
+"""This module keeps logged in eFlyt sessions so they can be reused instead of logging in again.
+Sessions are handed back to the manager when a lookup pool closes, and reused by the next pool,
+e.g. when the process is tried again. If config.SESSION_PERSIST is True the cookies of the sessions
+are kept encrypted on disk when the manager closes, so the next run can continue the logins.
+A session is checked before it's reused and only logged in again if it has expired,
+and sessions that aren't in use are refreshed in the background so they don't expire.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urljoin
+
+from cryptography.fernet import InvalidToken
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from OpenOrchestrator.common import crypto_util
+from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
+
+from robot_framework import browser as browser_factory
+from robot_framework import config
+from robot_framework import eflyt_http
+from robot_framework import throttle
+from robot_framework import timing
+
+
+@dataclass(frozen=True)
+class _Backend:
+    """The functions used to handle the sessions of a lookup backend."""
+    login: Callable[[str, str], Any]
+    relogin: Callable[[Any, str, str], None]
+    restore: Callable[[list[dict]], Any]
+    is_logged_in: Callable[[Any], bool]
+    get_cookies: Callable[[Any], list[dict]]
+    close: Callable[[Any], None]
+
+
+@dataclass
+class _Entry:
+    """A session known by the manager. The lock is held while the session is used."""
+    session: Any
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class SessionManager:
+    """Hands out logged in eFlyt sessions and takes them back for reuse. Thread safe.
+    Use it as a context manager to make sure all sessions are closed again.
+    """
+    # pylint: disable-next=too-many-positional-arguments
+    def __init__(self, username: str, password: str, backend: str | None = None,
+                 store_path: str | None = None, keep_alive_interval: float | None = None):
+        """Arguments left as None are read from config when the manager is created.
+
+        Args:
+            username: Username for login.
+            password: Password for login.
+            backend: The lookup backend, "selenium" or "http". Defaults to config.LOOKUP_BACKEND.
+            store_path: The file sessions are kept in between runs. Defaults to config.SESSION_STORE_PATH.
+                Sessions are only kept if config.SESSION_PERSIST is True.
+            keep_alive_interval: The number of seconds a session may sit unused before it's refreshed.
+                0 disables the refresh. Defaults to config.SESSION_KEEP_ALIVE_INTERVAL.
+        """
+        self._username = username
+        self._password = password
+        self._backend = _BACKENDS[backend or config.LOOKUP_BACKEND]
+        self._store_path = Path(store_path or config.SESSION_STORE_PATH) if config.SESSION_PERSIST else None
+        self._keep_alive_interval = config.SESSION_KEEP_ALIVE_INTERVAL if keep_alive_interval is None else keep_alive_interval
+
+        self._lock = threading.Lock()
+        self._entries: dict[int, _Entry] = {}
+        self._idle: list[_Entry] = []
+        self._stored = self._load() if self._store_path else []
+        self.logins = 0
+        self.reuses = 0
+
+        self._stopped = threading.Event()
+        self._keep_alive_thread = None
+        if self._keep_alive_interval > 0:
+            self._keep_alive_thread = threading.Thread(target=self._keep_alive, name="eflyt-keep-alive", daemon=True)
+            self._keep_alive_thread.start()
+
+    def __enter__(self) -> "SessionManager":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def acquire(self) -> Any:
+        """Get a logged in session.
+        An idle session is reused if any, then a session kept from an earlier run, and only then is a new session logged in.
+
+        Returns:
+            A logged in browser or EflytHttpSession, depending on the backend.
+        """
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            with entry.lock:
+                if self._refresh(entry):
+                    self._count("reuses")
+                    return entry.session
+            self._discard(entry)
+
+        while True:
+            with self._lock:
+                cookies = self._stored.pop() if self._stored else None
+            if cookies is None:
+                break
+            session = self._restore(cookies)
+            if session is not None:
+                self._count("reuses")
+                return self._register(session).session
+
+        with timing.span("eflyt_login"):
+            session = self._backend.login(self._username, self._password)
+        self._count("logins")
+        return self._register(session).session
+
+    def release(self, session: Any) -> None:
+        """Hand a session back to be reused.
+
+        Args:
+            session: A session from acquire.
+        """
+        entry = self._entries[id(session)]
+        entry.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(entry)
+
+    def wrap(self, lookup: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+        """Wrap a lookup so the session is logged in again and the lookup run again if it fails because the session expired.
+
+        Args:
+            lookup: A function taking a session from acquire and a job.
+
+        Returns:
+            The wrapped lookup.
+        """
+        def inner(session: Any, job: Any) -> Any:
+            entry = self._entries[id(session)]
+            with entry.lock:
+                try:
+                    return lookup(session, job)
+                # Any error may be caused by an expired session, since eFlyt just shows the login page.
+                # pylint: disable-next = broad-exception-caught
+                except Exception:
+                    if not self._has_expired(entry):
+                        raise
+                    self._relogin(entry)
+                    return lookup(session, job)
+                finally:
+                    entry.last_used = time.monotonic()
+        return inner
+
+    def close(self) -> None:
+        """Stop the keep alive, keep the logins of the sessions on disk if enabled, and close all sessions."""
+        self._stopped.set()
+        if self._keep_alive_thread:
+            self._keep_alive_thread.join()
+            self._keep_alive_thread = None
+
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._idle.clear()
+
+        if self._store_path:
+            self._save(entries)
+        for entry in entries:
+            _close_quietly(self._backend, entry.session)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _register(self, session: Any) -> _Entry:
+        entry = _Entry(session)
+        with self._lock:
+            self._entries[id(session)] = entry
+        return entry
+
+    def _discard(self, entry: _Entry) -> None:
+        with self._lock:
+            self._entries.pop(id(entry.session), None)
+        _close_quietly(self._backend, entry.session)
+
+    def _has_expired(self, entry: _Entry) -> bool:
+        """Check if a session has expired. A session that can't be checked is not counted as expired."""
+        try:
+            with timing.span("eflyt_session_check"):
+                return not self._backend.is_logged_in(entry.session)
+        # pylint: disable-next = broad-exception-caught
+        except Exception:
+            return False
+
+    def _relogin(self, entry: _Entry) -> None:
+        with timing.span("eflyt_login"):
+            self._backend.relogin(entry.session, self._username, self._password)
+        self._count("logins")
+        entry.last_used = time.monotonic()
+
+    def _refresh(self, entry: _Entry) -> bool:
+        """Make sure a session is logged in, logging in again if it has expired. The entry's lock must be held.
+
+        Returns:
+            False if the session is broken and should be discarded.
+        """
+        try:
+            with timing.span("eflyt_session_check"):
+                logged_in = self._backend.is_logged_in(entry.session)
+            if not logged_in:
+                self._relogin(entry)
+        # A broken session is replaced instead of failing the process.
+        # pylint: disable-next = broad-exception-caught
+        except Exception:
+            return False
+        entry.last_used = time.monotonic()
+        return True
+
+    def _restore(self, cookies: list[dict]) -> Any | None:
+        """Open a session with the cookies of a session kept from an earlier run.
+
+        Returns:
+            The session if it's still logged in, otherwise None.
+        """
+        session = None
+        try:
+            session = self._backend.restore(cookies)
+            with timing.span("eflyt_session_check"):
+                if self._backend.is_logged_in(session):
+                    return session
+        # A kept session that can't be restored is just skipped.
+        # pylint: disable-next = broad-exception-caught
+        except Exception:
+            pass
+        if session is not None:
+            _close_quietly(self._backend, session)
+        return None
+
+    def _keep_alive(self) -> None:
+        """The loop of the keep alive thread, refreshing sessions that have been unused for the keep alive interval.
+        Sessions in use are skipped, since they are kept alive by being used.
+        """
+        while not self._stopped.wait(self._keep_alive_interval / 2):
+            with self._lock:
+                entries = list(self._entries.values())
+            for entry in entries:
+                if time.monotonic() - entry.last_used < self._keep_alive_interval:
+                    continue
+                if not entry.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if id(entry.session) in self._entries:
+                        self._refresh(entry)
+                finally:
+                    entry.lock.release()
+
+    def _load(self) -> list[list[dict]]:
+        """Read the sessions kept from an earlier run and delete the file, so they are only used once.
+
+        Returns:
+            The cookies of each kept session, or an empty list if there are none or they are too old.
+        """
+        if not self._store_path.exists():
+            return []
+        try:
+            stored = json.loads(crypto_util.decrypt_string(self._store_path.read_text(encoding="utf-8")))
+        except (InvalidToken, ValueError):
+            stored = None
+        self._store_path.unlink(missing_ok=True)
+
+        if stored is None or time.time() - stored["saved"] > config.SESSION_MAX_AGE:
+            return []
+        return stored["sessions"]
+
+    def _save(self, entries: list[_Entry]) -> None:
+        """Keep the cookies of the sessions encrypted on disk."""
+        sessions = []
+        for entry in entries:
+            try:
+                sessions.append(self._backend.get_cookies(entry.session))
+            # pylint: disable-next = broad-exception-caught
+            except Exception:
+                pass
+        if not sessions:
+            return
+
+        self._store_path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"saved": time.time(), "sessions": sessions})
+        self._store_path.write_text(crypto_util.encrypt_string(data), encoding="utf-8")
+
+
+def open_session_manager(orchestrator_connection: OrchestratorConnection) -> SessionManager:
+    """Create a session manager logging in with the eFlyt credentials from OpenOrchestrator.
+
+    Args:
+        orchestrator_connection: Connection used to get the eFlyt credentials.
+
+    Returns:
+        A SessionManager using config.LOOKUP_BACKEND.
+    """
+    eflyt_credentials = orchestrator_connection.get_credential(config.EFLYT_LOGIN)
+    return SessionManager(eflyt_credentials.username, eflyt_credentials.password)
+
+
+def _close_quietly(backend: _Backend, session: Any) -> None:
+    """Close a session, ignoring errors from sessions that are already broken."""
+    try:
+        backend.close(session)
+    # pylint: disable-next = broad-exception-caught
+    except Exception:
+        pass
+
+
+def _restore_browser(cookies: list[dict]) -> webdriver.Chrome:
+    """Open a browser with the cookies of a browser kept from an earlier run."""
+    browser = browser_factory.create_browser()
+    try:
+        # Cookies can only be added for the domain currently open
+        browser.get(config.EFLYT_URL)
+        for cookie in cookies:
+            browser.add_cookie(cookie)
+    except Exception:
+        browser.quit()
+        raise
+    return browser
+
+
+def _browser_is_logged_in(browser: webdriver.Chrome) -> bool:
+    """Check if a browser is still logged in by loading the search page.
+    eFlyt sends an expired session back to the login page.
+    """
+    search_url = urljoin(config.EFLYT_URL, "/web/SearchResulteFlyt.aspx")
+    with throttle.request():
+        browser.get(search_url)
+    return bool(browser.find_elements(By.ID, "ctl00_imgLogo"))
+
+
+def _restore_http_session(cookies: list[dict]) -> eflyt_http.EflytHttpSession:
+    """Open an HTTP session with the cookies of a session kept from an earlier run."""
+    session = eflyt_http.EflytHttpSession()
+    session.add_cookies(cookies)
+    return session
+
+
+_BACKENDS = {
+    "selenium": _Backend(
+        login=browser_factory.login,
+        relogin=browser_factory.login_browser,
+        restore=_restore_browser,
+        is_logged_in=_browser_is_logged_in,
+        get_cookies=lambda browser: browser.get_cookies(),
+        close=lambda browser: browser.quit()
+    ),
+    "http": _Backend(
+        login=eflyt_http.login,
+        relogin=lambda session, username, password: session.login(username, password),
+        restore=_restore_http_session,
+        is_logged_in=lambda session: session.is_logged_in(),
+        get_cookies=lambda session: session.get_cookies(),
+        close=lambda session: session.close()
+    ),
+}
@@ -1,18 +1,39 @@
-"""This module has functionality to send error screenshots via smtp."""
+"""This module has functionality to send error screenshots via smtp.
+Reports are sent by a background thread over a single smtp connection, so sending doesn't hold up the process.
+Screenshots are downscaled and compressed, and sent as attachments.
+Identical errors within a run are only reported once, with the number of times they happened.
+Call flush at the end of the run to make sure all reports are sent.
+"""
 
+import queue
 import smtplib
-from email.message import EmailMessage
-import base64
+import threading
 import traceback
+from dataclasses import dataclass
+from email.message import EmailMessage
 from io import BytesIO
 
-from PIL import ImageGrab
-
 from robot_framework import config
 
 
+@dataclass
+# pylint: disable-next=too-many-instance-attributes
+class _Report:
+    """An error to report, and how many times it has happened and been reported."""
+    to_address: str | list[str]
+    process_name: str
+    error_type: str
+    error_message: str
+    trace: str
+    screenshot: bytes | None
+    count: int = 1
+    sent_count: int = 0
+
+
 def send_error_screenshot(to_address: str | list[str], exception: Exception, process_name: str):
     """Sends an email with an error report, including a screenshot, when an exception occurs.
+    The screenshot and traceback are taken right away, while the email is sent in the background.
+    An error identical to one already reported in this run isn't sent again, but counted.
     Configuration details such as SMTP server, port, sender email, etc., should be set in 'config' module.
 
     Args:
@@ -20,34 +41,183 @@ def send_error_screenshot(to_address: str | list[str], exception: Exception, pro
         exception: The exception that triggered the error.
         process_name: Name of the process from OpenOrchestrator.
     """
-    # Create message
+    _sender.report(to_address, exception, process_name)
+
+
+def flush() -> None:
+    """Wait for all error reports to be sent and close the smtp connection.
+    Errors that happened again after they were reported are sent in a single summary.
+
+    Raises:
+        Exception: The first error raised while sending, if any.
+    """
+    _sender.flush()
+
+
+class _Sender:
+    """Keeps the error reports of the run and sends them from a background thread."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reports: dict[tuple, _Report] = {}
+        self._queue: queue.Queue[EmailMessage | _Report | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._errors: list[Exception] = []
+
+    def report(self, to_address: str | list[str], exception: Exception, process_name: str) -> None:
+        """Queue a report of an error, or count it if an identical error was already reported."""
+        key = (str(to_address), process_name, type(exception).__name__, str(exception))
+        with self._lock:
+            report = self._reports.get(key)
+            if report:
+                report.count += 1
+                return
+
+            report = _Report(to_address, process_name, type(exception).__name__, str(exception), traceback.format_exc(), _grab_screenshot())
+            self._reports[key] = report
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="error-screenshot", daemon=True)
+                self._thread.start()
+        self._queue.put(report)
+
+    def flush(self) -> None:
+        """Send all queued reports and a summary of repeated errors, then stop the thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+
+        self._queue.join()
+        with self._lock:
+            repeated = [report for report in self._reports.values() if report.count > report.sent_count]
+        for message in _build_summaries(repeated):
+            self._queue.put(message)
+        self._queue.put(None)
+        thread.join()
+
+        with self._lock:
+            self._thread = None
+            self._reports.clear()
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def _work(self) -> None:
+        """The loop of the background thread, sending messages over a reused smtp connection."""
+        smtp = None
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                if isinstance(item, _Report):
+                    with self._lock:
+                        item.sent_count = item.count
+                        item = _build_message(item)
+                smtp = _send(smtp, item)
+            # Errors are raised from flush instead, so they don't stop later reports.
+            # pylint: disable-next = broad-exception-caught
+            except Exception as error:
+                self._errors.append(error)
+                _quit(smtp)
+                smtp = None
+            finally:
+                self._queue.task_done()
+        _quit(smtp)
+
+
+def _grab_screenshot() -> bytes | None:
+    """Take a screenshot, downscaled to fit config.SCREENSHOT_MAX_SIZE and compressed as config.SCREENSHOT_FORMAT.
+
+    Returns:
+        The compressed image, or None if there is no screen to take a screenshot of.
+    """
+    # PIL is only needed once an error happens, so it isn't imported at startup
+    from PIL import ImageGrab  # pylint: disable=import-outside-toplevel
+
+    try:
+        screenshot = ImageGrab.grab()
+    except OSError:
+        return None
+
+    screenshot.thumbnail(config.SCREENSHOT_MAX_SIZE)
+    buffer = BytesIO()
+    screenshot.convert("RGB").save(buffer, format=config.SCREENSHOT_FORMAT, quality=config.SCREENSHOT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def _build_message(report: _Report) -> EmailMessage:
+    """Create the email of an error report, with the screenshot attached."""
     msg = EmailMessage()
-    msg['to'] = to_address
+    msg['to'] = report.to_address
     msg['from'] = config.SCREENSHOT_SENDER
-    msg['subject'] = f"Error screenshot: {process_name}"
+    msg['subject'] = f"Error screenshot: {report.process_name}"
 
-    # Take screenshot and convert to base64
-    screenshot = ImageGrab.grab()
-    buffer = BytesIO()
-    screenshot.save(buffer, format='PNG')
-    screenshot_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-    # Create an HTML message with the exception and screenshot
-    html_message = f"""
-    <html>
-        <body>
-            <p>Error type: {type(exception).__name__}</p>
-            <p>Error message: {exception}</p>
-            <p>{traceback.format_exc()}</p>
-            <img src="data:image/png;base64,{screenshot_base64}" alt="Screenshot">
-        </body>
-    </html>
-    """
+    lines = [
+        f"Error type: {report.error_type}",
+        f"Error message: {report.error_message}",
+    ]
+    if report.count > 1:
+        lines.append(f"Occurrences: {report.count}")
+    lines += ["", report.trace]
+    if report.screenshot is None:
+        lines.append("No screenshot could be taken.")
+    msg.set_content("\n".join(lines))
+
+    if report.screenshot is not None:
+        subtype = config.SCREENSHOT_FORMAT.lower()
+        msg.add_attachment(report.screenshot, maintype="image", subtype=subtype, filename=f"screenshot.{subtype.replace('jpeg', 'jpg')}")
+    return msg
+
+
+def _build_summaries(reports: list[_Report]) -> list[EmailMessage]:
+    """Create an email for each receiver and process listing the errors that happened again after they were reported."""
+    grouped: dict[tuple, list[_Report]] = {}
+    for report in reports:
+        grouped.setdefault((str(report.to_address), report.process_name), []).append(report)
 
-    msg.set_content("Please enable HTML to view this message.")
-    msg.add_alternative(html_message, subtype='html')
+    messages = []
+    for group in grouped.values():
+        msg = EmailMessage()
+        msg['to'] = group[0].to_address
+        msg['from'] = config.SCREENSHOT_SENDER
+        msg['subject'] = f"Repeated errors: {group[0].process_name}"
+        lines = ["These errors happened again after they were reported:", ""]
+        for report in group:
+            lines.append(f"{report.error_type}: {report.error_message} ({report.count - report.sent_count} more times, {report.count} in total)")
+        msg.set_content("\n".join(lines))
+        messages.append(msg)
+    return messages
 
-    # Send message
-    with smtplib.SMTP(config.SMTP_SERVER, config.SMTP_PORT) as smtp:
-        smtp.starttls()
+
+def _send(smtp: smtplib.SMTP | None, msg: EmailMessage) -> smtplib.SMTP:
+    """Send a message, connecting first if there is no connection, and reconnecting once if the server closed it.
+
+    Returns:
+        The connection, to be reused for the next message.
+    """
+    if smtp is None:
+        smtp = _connect()
+    try:
         smtp.send_message(msg)
+    except smtplib.SMTPServerDisconnected:
+        smtp = _connect()
+        smtp.send_message(msg)
+    return smtp
+
+
+def _connect() -> smtplib.SMTP:
+    smtp = smtplib.SMTP(config.SMTP_SERVER, config.SMTP_PORT)
+    smtp.starttls()
+    return smtp
+
+
+def _quit(smtp: smtplib.SMTP | None) -> None:
+    """Close a connection if any, ignoring errors from a connection that is already closed."""
+    if smtp is not None:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+_sender = _Sender()
@@ -0,0 +1,110 @@
+"""This module contains a writer for Excel sheets that doesn't keep the rows in memory.
+openpyxl's write-only mode needs column widths before the first row is written, so rows are
+spooled to a temporary file while the widths are tracked, and streamed into the sheet on save.
+"""
+
+import itertools
+import json
+import tempfile
+from io import BytesIO
+from typing import Any, Iterable, Iterator
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+
+class StreamingExcelWriter:
+    """Writes rows to a single Excel sheet with a bold header and columns sized to their widest content.
+    Memory use doesn't depend on the number of rows.
+    """
+    def __init__(self, header: list[str]):
+        """
+        Args:
+            header: The values of the header row.
+        """
+        self.header = header
+        self._widths = [len(str(value)) for value in header]
+        self._spool = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.row_count = 0
+
+    def __enter__(self) -> "StreamingExcelWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def append(self, row: list[Any]) -> None:
+        """Add a row to the sheet.
+
+        Args:
+            row: The values of the row. Values must be json serializable.
+        """
+        for i, value in enumerate(row):
+            width = len(str(value)) if value is not None else 0
+            if i >= len(self._widths):
+                self._widths.append(width)
+            elif width > self._widths[i]:
+                self._widths[i] = width
+        self._spool.write(json.dumps(row) + "\n")
+        self.row_count += 1
+
+    def save(self) -> BytesIO:
+        """Write the sheet with all rows added so far.
+
+        Returns:
+            A BytesIO object containing the Excel sheet.
+        """
+        return self._write(self.iter_rows())
+
+    def save_parts(self, part_count: int) -> list[BytesIO]:
+        """Write the rows added so far split evenly over a number of sheets, each with the header.
+        The column widths of every part are those of all rows, so the parts look alike.
+
+        Args:
+            part_count: The number of sheets to split the rows over.
+
+        Returns:
+            A BytesIO object containing each Excel sheet.
+        """
+        rows_per_part = -(-self.row_count // part_count)
+        rows = self.iter_rows()
+        return [self._write(itertools.islice(rows, rows_per_part)) for _ in range(part_count)]
+
+    def iter_rows(self) -> Iterator[list[Any]]:
+        """Read back the rows added so far, without the header.
+
+        Yields:
+            The values of each row.
+        """
+        self._spool.seek(0)
+        try:
+            for line in self._spool:
+                yield json.loads(line)
+        finally:
+            self._spool.seek(0, 2)
+
+    def _write(self, rows: Iterable[list[Any]]) -> BytesIO:
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet()
+        for i, width in enumerate(self._widths, start=1):
+            sheet.column_dimensions[get_column_letter(i)].width = width + 2
+
+        header = []
+        for value in self.header:
+            cell = WriteOnlyCell(sheet, value)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        sheet.append(header)
+
+        for row in rows:
+            sheet.append(row)
+
+        file = BytesIO()
+        wb.save(file)
+        return file
+
+    def close(self) -> None:
+        """Delete the temporary file holding the rows."""
+        self._spool.close()
@@ -17,7 +17,7 @@ def handle_error(message: str, error: Exception, queue_element: QueueElement | N
     """Handles an error caught during the process.
     Logs an error to OpenOrchestrator.
     Marks the queue element (if any) as failed.
-    Sends an error screenshot by email.
+    Sends an error screenshot by email in the background, see error_screenshot.flush.
 
     Args:
         message: A message to prepend to the error message.
@@ -1,64 +1,131 @@
-"""This module defines any initial processes to run when the robot starts."""
+"""This module defines any initial processes to run when the robot starts.
+openpyxl and the process module are only imported once an email is found,
+so a run without any emails starts and stops quickly.
+"""
+
+from __future__ import annotations
 
 import re
 from io import BytesIO
-
-from openpyxl import load_workbook
-from openpyxl.worksheet.worksheet import Worksheet
+from typing import Iterable, Iterator, Sequence, TYPE_CHECKING
 
 from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
 from itk_dev_shared_components.graph import mail
 from itk_dev_shared_components.graph.authentication import GraphAccess
 from robot_framework import config
-from robot_framework.process import EmailInput, CprCaseRow
+from robot_framework import timing
+
+if TYPE_CHECKING:
+    from robot_framework.process import EmailInput, CprCaseRow
+
+CPR_PATTERN = re.compile(r"\d{6}-?\d{4}")
 
 
-def initialize(graph_access: GraphAccess, orchestrator_connection: OrchestratorConnection) -> EmailInput | None:
-    """Do all custom startup initializations of the robot."""
+def initialize(graph_access: GraphAccess, orchestrator_connection: OrchestratorConnection) -> list[EmailInput]:
+    """Do all custom startup initializations of the robot.
+    Reads every email in the source folder, or only the first if config.PROCESS_ALL_EMAILS is False.
+    """
     orchestrator_connection.log_trace("Initializing.")
 
     # Create a work list of EmailInput from read emails
-    emails = mail.get_emails_from_folder("itk-rpa@mkb.aarhus.dk", config.MAIL_SOURCE_FOLDER, graph_access)
-    if emails:
-        return _read_input_from_email(emails[0], graph_access)
-    return None
+    with timing.span("graph_list_emails"):
+        emails = mail.get_emails_from_folder("itk-rpa@mkb.aarhus.dk", config.MAIL_SOURCE_FOLDER, graph_access)
+    if not config.PROCESS_ALL_EMAILS:
+        emails = emails[:1]
+    return [_read_input_from_email(email, graph_access) for email in emails]
 
 
 def _read_input_from_email(email: mail.Email, graph_access: GraphAccess) -> EmailInput:
     """Read input and return pair of cases and cpr numbers"""
+    from robot_framework.process import EmailInput  # pylint: disable=import-outside-toplevel
+
     requester = _get_recipient_from_email(email.body)
-    attachments = mail.list_email_attachments(email, graph_access)
-    email_attachment = mail.get_attachment_data(attachments[0], graph_access)
-    cpr_cases = _read_xlsx(email_attachment)
+    with timing.span("graph_attachment_download"):
+        attachments = mail.list_email_attachments(email, graph_access)
+        email_attachment = mail.get_attachment_data(attachments[0], graph_access)
+    cpr_cases = _XlsxRows(email_attachment)
     return EmailInput(cpr_cases, requester, email)
 
 
-def _read_xlsx(email_attachment: BytesIO) -> list[CprCaseRow]:
-    """Read data from XLSX
+# pylint: disable-next=too-few-public-methods
+class _XlsxRows:
+    """The rows of an XLSX attachment, read lazily each time they are iterated.
+    This lets a retry of the process read the rows again from the start.
+    """
+    def __init__(self, email_attachment: BytesIO):
+        self._email_attachment = email_attachment
+
+    def __iter__(self) -> Iterator[CprCaseRow]:
+        return read_xlsx(self._email_attachment)
+
+
+def read_xlsx(email_attachment: BytesIO) -> Iterator[CprCaseRow]:
+    """Read data from XLSX one row at a time.
+    Empty rows, rows missing a column, manual rows and rows with an invalid CPR number are skipped.
 
     Args:
         email_attachment: Attachment to read from.
 
-    Returns:
-        Return a CPR case with data from attachment.
+    Yields:
+        A CPR case with data from each valid row in the attachment.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from openpyxl import load_workbook
+
+    email_attachment.seek(0)
+    input_sheet = load_workbook(email_attachment, read_only=True).active
+
+    iter_ = input_sheet.iter_rows(values_only=True)
+    next(iter_, None)  # Skip header row
+    yield from read_rows(iter_)
+
+
+def read_rows(rows: Iterable[Sequence]) -> Iterator[CprCaseRow]:
+    """Read the rows of an input sheet without its header row, one row at a time.
+    Empty rows, rows missing a column, manual rows and rows with an invalid CPR number are skipped.
+
+    Args:
+        rows: The values of the case, cpr and name columns of each row.
+
+    Yields:
+        A CPR case with data from each valid row.
     """
-    input_sheet: Worksheet = load_workbook(email_attachment, read_only=True).active
+    from robot_framework.process import CprCaseRow  # pylint: disable=import-outside-toplevel
 
-    cases = []
+    for row in rows:
+        if len(row) < 3 or row[0] in (None, "") or row[0] == "Manuel":
+            continue
 
-    iter_ = iter(input_sheet)
-    next(iter_)  # Skip header row
-    for row in iter_:
-        if row[0].value == "Manuel":
+        cpr = _format_cpr(row[1])
+        if cpr is None:
             continue
-        case = CprCaseRow(
-            case=row[0].value,
-            cpr=row[1].value,
-            name=row[2].value,
+
+        yield CprCaseRow(
+            case=str(row[0]).strip(),
+            cpr=cpr,
+            name=row[2],
             phone_numbers=None
         )
-        cases.append(case)
-    return cases
+
+
+def _format_cpr(value: str | int | None) -> str | None:
+    """Check the format of a CPR number from the input.
+    CPR numbers stored as numbers in Excel lose their leading zero, which is added back.
+
+    Args:
+        value: The value of the CPR cell.
+
+    Returns:
+        The CPR number as text, or None if it isn't a valid CPR number.
+    """
+    if isinstance(value, int):
+        value = f"{value:010}"
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not CPR_PATTERN.fullmatch(value):
+        return None
+    return value
 
 
 def _get_recipient_from_email(user_data: str) -> str:
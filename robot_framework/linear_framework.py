@@ -9,10 +9,10 @@ import json
 from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
 from itk_dev_shared_components.graph import authentication
 
+from robot_framework import error_screenshot
 from robot_framework import initialize
 from robot_framework import reset
 from robot_framework.exceptions import BusinessError, handle_error, log_exception
-from robot_framework import process
 from robot_framework import config
 
 
@@ -25,29 +25,43 @@ def main():
     graph_access = authentication.authorize_by_username_password(graph_credentials.username, **json.loads(graph_credentials.password))
 
     orchestrator_connection.log_trace("Robot Framework started.")
-    email_data = initialize.initialize(graph_access, orchestrator_connection)
+    email_inputs = initialize.initialize(graph_access, orchestrator_connection)
 
+    # Most scheduled runs find no emails, so stop before loading and resetting anything else
+    if not email_inputs:
+        orchestrator_connection.log_trace("No emails found. Stopping.")
+        return
+
+    # The process and the eFlyt sessions pull in selenium and openpyxl, so they are only imported when there is work to do
+    # pylint: disable-next=import-outside-toplevel
+    from robot_framework import eflyt_session, process
+
+    # The eFlyt sessions are kept between tries so a retry doesn't have to log in again
     error_count = 0
-    for _ in range(config.MAX_RETRY_COUNT):
-        try:
-            reset.reset(orchestrator_connection)
-            process.process(email_data, graph_access, orchestrator_connection)
-            break
-
-        # If any business rules are broken the robot should stop entirely.
-        except BusinessError as error:
-            handle_error("Business Error", error, None, orchestrator_connection)
-            break
-
-        # We actually want to catch all exceptions possible here.
-        # pylint: disable-next = broad-exception-caught
-        except Exception as error:
-            error_count += 1
-            handle_error(f"Process Error #{error_count}", error, None, orchestrator_connection)
+    with eflyt_session.open_session_manager(orchestrator_connection) as sessions:
+        for _ in range(config.MAX_RETRY_COUNT):
+            try:
+                reset.reset(orchestrator_connection)
+                process.process(email_inputs, graph_access, orchestrator_connection, sessions)
+                break
+
+            # If any business rules are broken the robot should stop entirely.
+            except BusinessError as error:
+                handle_error("Business Error", error, None, orchestrator_connection)
+                break
+
+            # We actually want to catch all exceptions possible here.
+            # pylint: disable-next = broad-exception-caught
+            except Exception as error:
+                error_count += 1
+                handle_error(f"Process Error #{error_count}", error, None, orchestrator_connection)
 
     reset.clean_up(orchestrator_connection)
     reset.close_all(orchestrator_connection)
     reset.kill_all(orchestrator_connection)
 
+    # Make sure all error screenshots are sent before the robot stops
+    error_screenshot.flush()
+
     if config.FAIL_ROBOT_ON_TOO_MANY_ERRORS and error_count == config.MAX_RETRY_COUNT:
         raise RuntimeError("Process failed too many times.")
@@ -0,0 +1,169 @@
+"""This module contains a pool of eFlyt sessions used to run lookups in parallel.
+Each worker thread owns its own session and pulls jobs from a shared work queue.
+Results are funneled back to the thread calling LookupPool.run, so anything that isn't
+thread safe (like the connection to OpenOrchestrator) is only ever used from one thread.
+"""
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+
+@dataclass
+class _Failure:
+    """A dataclass wrapping an exception raised in a worker thread."""
+    error: Exception
+
+
+_STOP = object()
+
+
+# pylint: disable-next=too-many-instance-attributes
+class LookupPool:
+    """A pool of worker threads each running lookups on their own session.
+    Use the pool as a context manager to make sure all sessions are closed again.
+    """
+    def __init__(self, session_count: int, open_session: Callable[[], Any], lookup: Callable[[Any, Any], Any],
+                 close_session: Callable[[Any], None] = lambda session: session.quit(), *,
+                 retry_count: int = 0, retry_on: tuple[type[Exception], ...] = ()):
+        """
+        Args:
+            session_count: The number of sessions to open.
+            open_session: A function opening a new session, e.g. logging into eFlyt.
+            lookup: A function taking a session and a job and returning the result of the job.
+            close_session: A function closing a session again.
+            retry_count: The number of times a job is retried if it fails with one of the errors in retry_on.
+            retry_on: The errors that are retried.
+        """
+        if session_count < 1:
+            raise ValueError("The lookup pool needs at least one session.")
+
+        self.session_count = session_count
+        self._open_session = open_session
+        self._lookup = lookup
+        self._close_session = close_session
+        self._retry_count = retry_count
+        self._retry_on = retry_on
+
+        # The job queue is bounded so jobs are only read from the input as fast as they are handled
+        self._jobs = queue.Queue(maxsize=session_count * 2)
+        self._results = queue.Queue()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def __enter__(self) -> "LookupPool":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the worker threads and wait for all of them to open their session.
+
+        Raises:
+            Exception: The first error raised while opening a session.
+        """
+        ready = queue.Queue()
+        for i in range(self.session_count):
+            thread = threading.Thread(target=self._work, args=(ready,), name=f"eflyt-lookup-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        failures = [result for result in (ready.get() for _ in self._threads) if isinstance(result, _Failure)]
+        if failures:
+            self.close()
+            raise failures[0].error
+
+    def run(self, jobs: Iterable, on_result: Callable[[Any, Any], None]) -> None:
+        """Hand out the given jobs to the sessions in the pool and wait for all of them to finish.
+        on_result is called on the calling thread for each finished job, in the order they finish.
+
+        Args:
+            jobs: The jobs to run. The iterable is consumed lazily.
+            on_result: A function taking a job and its result.
+
+        Raises:
+            Exception: Any error raised by a lookup. Remaining jobs are discarded.
+        """
+        pending = 0
+        for job in jobs:
+            while True:
+                try:
+                    self._jobs.put_nowait(job)
+                    pending += 1
+                    break
+                except queue.Full:
+                    self._handle_result(self._results.get(), on_result)
+                    pending -= 1
+
+            # Pass on any results that are already done while reading new jobs
+            while True:
+                try:
+                    result = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._handle_result(result, on_result)
+                pending -= 1
+
+        while pending:
+            self._handle_result(self._results.get(), on_result)
+            pending -= 1
+
+    def close(self) -> None:
+        """Discard any remaining jobs, stop the worker threads and close their sessions."""
+        self._stopped.set()
+        while True:
+            try:
+                self._jobs.get_nowait()
+            except queue.Empty:
+                break
+
+        for _ in self._threads:
+            self._jobs.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _handle_result(self, result: tuple[Any, Any] | _Failure, on_result: Callable[[Any, Any], None]) -> None:
+        if isinstance(result, _Failure):
+            self.close()
+            raise result.error
+        on_result(*result)
+
+    def _work(self, ready: queue.Queue) -> None:
+        """The loop run by each worker thread."""
+        try:
+            session = self._open_session()
+        # Any error is passed on to the calling thread.
+        # pylint: disable-next = broad-exception-caught
+        except Exception as error:
+            ready.put(_Failure(error))
+            return
+        ready.put(None)
+
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                if self._stopped.is_set():
+                    continue
+
+                try:
+                    self._results.put((job, self._run_job(session, job)))
+                # pylint: disable-next = broad-exception-caught
+                except Exception as error:
+                    self._results.put(_Failure(error))
+        finally:
+            self._close_session(session)
+
+    def _run_job(self, session: Any, job: Any) -> Any:
+        """Run a job, retrying it on the errors in retry_on."""
+        for _ in range(self._retry_count):
+            try:
+                return self._lookup(session, job)
+            except self._retry_on:
+                pass
+        return self._lookup(session, job)
@@ -0,0 +1,90 @@
+"""This module encodes the rows kept in the data of queue elements.
+Rows are written as a versioned JSON array of positional fields with normalized phone numbers,
+and encrypted with the OpenOrchestrator key by a single Fernet instance shared by all elements.
+Elements written as JSON objects by earlier versions of the robot can still be read.
+"""
+
+import json
+import re
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, InvalidToken
+from OpenOrchestrator.common import crypto_util
+
+# The version written as the first field of each payload
+VERSION = 1
+
+# The fields of a row in the order they are written in a version 1 payload
+FIELDS = ("case", "cpr", "name", "phone_numbers")
+
+# Spaces, dashes, dots and parentheses used to group the digits of a phone number
+_SEPARATORS = re.compile(r"[\s\-.()]")
+_DANISH_PREFIX = re.compile(r"^(?:\+|00)45(?=\d{8}$)")
+
+
+def encode(case: str, cpr: str, name: str, phone_numbers: list[str] | None) -> str:
+    """Encode and encrypt a row for the data of a queue element.
+
+    Args:
+        case: The case number.
+        cpr: The cpr number.
+        name: The name of the person.
+        phone_numbers: The phone numbers of the person, normalized before they are written.
+
+    Returns:
+        The encrypted payload.
+    """
+    if phone_numbers is not None:
+        phone_numbers = [normalize_phone_number(number) for number in phone_numbers]
+    data = json.dumps([VERSION, case, cpr, name, phone_numbers], ensure_ascii=False, separators=(",", ":"))
+    return _fernet(crypto_util.get_key()).encrypt(data.encode()).decode()
+
+
+def decode(data: str) -> dict:
+    """Decrypt and decode the data of a queue element, in the current or the earlier JSON object format.
+
+    Args:
+        data: The encrypted payload.
+
+    Returns:
+        The fields of the row by name.
+
+    Raises:
+        ValueError: If the data can't be decrypted with the key, or is of an unknown version.
+    """
+    try:
+        decrypted = _fernet(crypto_util.get_key()).decrypt(data.encode())
+    except InvalidToken as exc:
+        raise ValueError("Couldn't verify signature. The decryption key is not the same as the encryption key.") from exc
+
+    values = json.loads(decrypted)
+    # Elements written before the payload was versioned hold an object of the fields
+    if isinstance(values, dict):
+        return values
+    if values[0] != VERSION:
+        raise ValueError(f"Unknown payload version: {values[0]}")
+    return dict(zip(FIELDS, values[1:]))
+
+
+def normalize_phone_number(number: str) -> str:
+    """Remove the grouping of the digits of a phone number, and the country code of Danish numbers.
+    Text that isn't a phone number, like "N/A", is kept as it is.
+
+    Args:
+        number: The phone number as shown in eFlyt, e.g. "86 12 34 00" or "+45 86 12 34 00".
+
+    Returns:
+        The normalized phone number, e.g. "86123400".
+    """
+    compact = _SEPARATORS.sub("", number)
+    if not compact.lstrip("+").isdigit():
+        return number
+    return _DANISH_PREFIX.sub("", compact)
+
+
+@lru_cache(maxsize=1)
+def _fernet(key: str | None) -> Fernet:
+    """Get a Fernet for the key, so the key is only parsed once instead of for each element."""
+    if not key:
+        raise RuntimeError("Can't encrypt or decrypt without an encryption key.")
+    return Fernet(key)
@@ -0,0 +1,88 @@
+"""This module contains a local cache of phone numbers already looked up in eFlyt.
+Entries are keyed by the hashed cpr number and the phone numbers are stored encrypted,
+so the cache file holds no personal data in clear text.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from OpenOrchestrator.common import crypto_util
+
+from robot_framework import config
+
+
+class PhoneCache:
+    """A persistent cache of phone numbers with a time to live and a maximum size.
+    When the cache grows above its maximum size the least recently used entries are evicted.
+    Use it as a context manager to make sure the cache file is closed again.
+    """
+    def __init__(self, path: str | None = None, ttl: float | None = None, max_size: int | None = None):
+        """Arguments left as None are read from config when the cache is opened.
+
+        Args:
+            path: The path of the cache file. Defaults to config.PHONE_CACHE_PATH.
+            ttl: The number of seconds an entry is valid. Defaults to config.PHONE_CACHE_TTL.
+            max_size: The maximum number of entries kept. Defaults to config.PHONE_CACHE_MAX_SIZE.
+        """
+        path = path or config.PHONE_CACHE_PATH
+        ttl = config.PHONE_CACHE_TTL if ttl is None else ttl
+        max_size = config.PHONE_CACHE_MAX_SIZE if max_size is None else max_size
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS phone_cache (reference TEXT PRIMARY KEY, data TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._ttl = ttl
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evict()
+
+    def __enter__(self) -> "PhoneCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def get(self, reference: str) -> list[str] | None:
+        """Get the phone numbers of a person if they are cached and not expired.
+
+        Args:
+            reference: The hashed cpr number of the person.
+
+        Returns:
+            The cached phone numbers or None if the person isn't in the cache.
+        """
+        now = time.time()
+        row = self._connection.execute("SELECT data FROM phone_cache WHERE reference = ? AND created > ?", (reference, now - self._ttl)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self._connection:
+            self._connection.execute("UPDATE phone_cache SET accessed = ? WHERE reference = ?", (now, reference))
+        return json.loads(crypto_util.decrypt_string(row[0]))
+
+    def put(self, reference: str, phone_numbers: list[str]) -> None:
+        """Add or replace the phone numbers of a person.
+
+        Args:
+            reference: The hashed cpr number of the person.
+            phone_numbers: The phone numbers to cache.
+        """
+        now = time.time()
+        data = crypto_util.encrypt_string(json.dumps(phone_numbers))
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO phone_cache VALUES (?, ?, ?, ?)", (reference, data, now, now))
+
+    def evict(self) -> None:
+        """Remove expired entries and the least recently used entries above the maximum size."""
+        with self._connection:
+            self._connection.execute("DELETE FROM phone_cache WHERE created <= ?", (time.time() - self._ttl,))
+            self._connection.execute("DELETE FROM phone_cache WHERE reference IN (SELECT reference FROM phone_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self._max_size,))
+
+    def close(self) -> None:
+        """Evict old entries and close the cache file."""
+        self.evict()
+        self._connection.close()
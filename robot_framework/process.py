@@ -2,24 +2,66 @@
 Emails come in through initialize, queue elements are created  and then queue elements are compiled to excel and sent out for each email found."""
 
 import json
-from dataclasses import dataclass, asdict
-from io import BytesIO
+from dataclasses import dataclass, replace
 import hashlib
+import itertools
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Iterable, Iterator
 
-from openpyxl import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.styles import Font
 from selenium import webdriver
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException, TimeoutException
+import requests
 from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection, QueueStatus, QueueElement
-from OpenOrchestrator.common import crypto_util
 import itk_dev_event_log
 
-from itk_dev_shared_components.eflyt import eflyt_login, eflyt_search
+from itk_dev_shared_components.eflyt import eflyt_search
 from itk_dev_shared_components.graph import mail
 from itk_dev_shared_components.graph.authentication import GraphAccess
 from itk_dev_shared_components.smtp import smtp_util
 from robot_framework import config
+from robot_framework import delivery
+from robot_framework import eflyt_http
+from robot_framework import eflyt_session
+from robot_framework import payload
+from robot_framework import throttle
+from robot_framework import timing
+from robot_framework.checkpoint import Checkpoint
+from robot_framework.delivery import PartialResults
+from robot_framework.eflyt_session import SessionManager
+from robot_framework.excel_writer import StreamingExcelWriter
+from robot_framework.lookup_pool import LookupPool
+from robot_framework.phone_cache import PhoneCache
+from robot_framework.reference_index import ReferenceIndex
+
+# The header of the result sheet
+RESULT_HEADER = ["Sagsnr.", "CPR", "Navn", "Telefonnumre"]
+
+# Errors in a lookup that are likely to pass when the lookup is tried again
+TRANSIENT_ERRORS = (StaleElementReferenceException, TimeoutException, requests.Timeout, requests.ConnectionError)
+
+# Reads cpr, row number and name of each person in the moving persons table, skipping the header row.
+# Returns null if the table doesn't exist.
+_READ_MOVING_PERSONS_SCRIPT = """
+const table = document.getElementById(arguments[0]);
+if (!table) {
+    return null;
+}
+return Array.from(table.rows).slice(1).map((row, index) => ({
+    cpr: row.cells[1].getElementsByTagName("a")[1].innerText.trim(),
+    row_number: index + 2,
+    name: row.cells[2].innerText.trim()
+}));
+"""
+
+# Reads the text of each label id given, or null if the label doesn't exist.
+_READ_LABELS_SCRIPT = """
+return Array.from(arguments).map(id => {
+    const label = document.getElementById(id);
+    return label ? label.innerText.trim() : null;
+});
+"""
 
 
 @dataclass
@@ -31,65 +73,254 @@ class CprCaseRow:
     phone_numbers: list[str]
 
 
+@dataclass
+class MovingPerson:
+    """A dataclass representing a row in the moving persons table of an eFlyt case."""
+    cpr: str
+    row_number: int
+    name: str
+
+
 @dataclass
 class EmailInput:
     '''A dataclass representing input from an email'''
-    cpr_cases: list[CprCaseRow]
+    cpr_cases: Iterable[CprCaseRow]
     requester: str
     email: mail.Email
-
-
-def process(email_data: EmailInput | None, graph_access: GraphAccess, orchestrator_connection: OrchestratorConnection) -> None:
-    """Do the primary process of the robot."""
+    done: bool = False
+    partial_count: int = 0
+
+
+def process(email_inputs: list[EmailInput], graph_access: GraphAccess, orchestrator_connection: OrchestratorConnection,
+            sessions: SessionManager | None = None) -> None:
+    """Do the primary process of the robot.
+    All emails are handled in the same eFlyt sessions, one email at a time, and each email gets its own results.
+    Emails already marked as done by an earlier try are skipped, and rows already handled by an earlier try
+    are skipped using a checkpoint kept for each email until its results are sent.
+    If config.PARTIAL_RESULTS is True, rows found are sent in partial results while an email is looked up,
+    and the time until the first result of each email is reported. The numbering of partial results continues across tries.
+    Pass a session manager to reuse the eFlyt sessions between tries, otherwise the sessions are closed when done.
+    The timing report and throttle stats sent at the end only cover this try.
+    """
     orchestrator_connection.log_trace("Running process.")
+    timing.reset()
+    throttle.reset()
     event_log = orchestrator_connection.get_constant("Event Log")
     itk_dev_event_log.setup_logging(event_log.value)
 
-    if email_data:
-        # Login
-        eflyt_credentials = orchestrator_connection.get_credential(config.EFLYT_LOGIN)
-        browser = eflyt_login.login(eflyt_credentials.username, eflyt_credentials.password)
-        # Read data
-        add_phonenumbers_to_queue_elements(email_data, browser, orchestrator_connection)
+    email_inputs = [email_input for email_input in email_inputs if not email_input.done]
+    if email_inputs:
         recipient = json.loads(orchestrator_connection.process_arguments)["return_email"]
-        cases = get_cases_from_queue(orchestrator_connection)
-        itk_dev_event_log.emit(orchestrator_connection.process_name, "Found phonenumbers", len(cases))
-        compile_results(cases, recipient, email_data.email, graph_access)
+        with timing.span("reference_index"):
+            references = ReferenceIndex(orchestrator_connection, config.QUEUE_NAME)
+
+        # Login and read data
+        with (nullcontext(sessions) if sessions else eflyt_session.open_session_manager(orchestrator_connection)) as session_manager, \
+                open_lookup_pool(session_manager) as pool:
+            for email_input in email_inputs:
+                started = time.monotonic()
+                earlier_partial_count = email_input.partial_count
+                with Checkpoint(email_input.email.id) as checkpoint, open_partial_results(recipient, email_input) as partial_results:
+                    add_phonenumbers_to_queue_elements(email_input.cpr_cases, pool, orchestrator_connection, checkpoint, references,
+                                                       on_written=partial_results.add_cases if partial_results else None)
+                    element_ids: list[str] = []
+                    cases = get_cases_from_queue(orchestrator_connection, checkpoint.request_id, element_ids)
+                    partial_count = partial_results.sent_count if partial_results else 0
+                    compile_results(cases, recipient, email_input, graph_access, partial_count)
+                    mark_queue_elements_done(orchestrator_connection, element_ids)
+                    # The first result was reported by the try that sent it
+                    if not earlier_partial_count:
+                        first_result_at = partial_results.first_sent_at if partial_count else time.monotonic()
+                        _report_time_to_first_result(orchestrator_connection, first_result_at - started)
+                    itk_dev_event_log.emit(orchestrator_connection.process_name, "Found phonenumbers", len(checkpoint))
+                    email_input.done = True
+                    checkpoint.delete()
+
+    timing.emit_report(orchestrator_connection.process_name)
+    throttle.emit_stats(orchestrator_connection.process_name)
+
+
+def open_lookup_pool(sessions: SessionManager) -> LookupPool:
+    """Create a pool of eFlyt sessions to run lookups in.
+    config.LOOKUP_BACKEND decides if the sessions are browsers or plain HTTP sessions.
+    The pool takes its sessions from the session manager when it's entered as a context manager,
+    and hands them back for reuse when it closes.
+    Lookups failing because the session expired are run again after logging in again.
+    Lookups failing with a transient error are retried on their own up to config.LOOKUP_RETRY_COUNT times.
+    The requests of all sessions to eFlyt are paced by the shared throttle, see robot_framework/throttle.py.
+
+    Args:
+        sessions: The session manager handing out logged in sessions.
+
+    Returns:
+        A LookupPool with config.LOOKUP_SESSION_COUNT sessions.
+    """
+    lookup = _lookup_phone_numbers_http if config.LOOKUP_BACKEND == "http" else _lookup_phone_numbers
+    return LookupPool(
+        config.LOOKUP_SESSION_COUNT,
+        sessions.acquire,
+        sessions.wrap(lookup),
+        sessions.release,
+        retry_count=config.LOOKUP_RETRY_COUNT,
+        retry_on=TRANSIENT_ERRORS
+    )
 
 
-def add_phonenumbers_to_queue_elements(email_input: EmailInput, browser: webdriver.Chrome, orchestrator_connection: OrchestratorConnection) -> None:
-    """Handle an email by looking up each pair of CPR and cases in eflyt and adding a phone number to the instance.
+# pylint: disable-next=too-many-arguments, too-many-positional-arguments
+def add_phonenumbers_to_queue_elements(cpr_cases: Iterable[CprCaseRow], pool: LookupPool, orchestrator_connection: OrchestratorConnection,
+                                       checkpoint: Checkpoint, references: ReferenceIndex | None = None,
+                                       on_written: Callable[[list[CprCaseRow]], None] | None = None) -> None:
+    """Handle the rows of a request by looking up each pair of CPR and cases in eflyt and adding a phone number to the instance.
+    The lookups are spread across the sessions in the pool, while queue elements are created from this thread only.
+    Rows recorded in the checkpoint are skipped, and each row added to the queue is recorded in it.
+    Queue elements are created in batches of config.QUEUE_WRITE_BATCH_SIZE, and a batch is recorded once it's written.
+    Each element is created by the checkpoint's request_id, so the request only drains its own elements.
+    Rows found in the local phone cache are added to the queue without a lookup, even if their CPR is already in the queue,
+    so a repeated request gets the persons looked up for an earlier request.
+    Other rows with a CPR already in the queue, or seen earlier in the input, are skipped.
+    Persons not found on their case are returned without phone numbers, but aren't cached or given a reference in the queue,
+    so a later request with the right case looks them up.
+    The remaining rows are grouped by case so each case is only opened once per group of rows.
+    The rows are read lazily, so lookups start as soon as the first row is read.
 
     Args:
-        email_input: An EmailInput object containing a list of CPR/Case pairs.
-        browser: A WebDriver to use selenium.
+        cpr_cases: The CPR/Case pairs of the request, e.g. the cpr_cases of an EmailInput.
+        pool: A started LookupPool of eFlyt sessions.
         orchestrator_connection: Connection used for creating queue elements
+        checkpoint: The checkpoint of the email.
+        references (optional): An index of the references in the queue to share between calls. If None a new index is read.
+        on_written (optional): Called with the rows of each batch once they are written to the queue.
+    """
+    if references is None:
+        references = ReferenceIndex(orchestrator_connection, config.QUEUE_NAME)
+
+    # The rows to write and the reference of their queue element
+    pending: list[tuple[CprCaseRow, str | None]] = []
+
+    def write_queue_elements():
+        if not pending:
+            return
+        queue_references = tuple(queue_reference for _, queue_reference in pending)
+        data = tuple(payload.encode(cpr_case_row.case, cpr_case_row.cpr, cpr_case_row.name, cpr_case_row.phone_numbers) for cpr_case_row, _ in pending)
+        with timing.span("queue_write"):
+            orchestrator_connection.bulk_create_queue_elements(config.QUEUE_NAME, queue_references, data, created_by=checkpoint.request_id)
+        # Cleared before on_written, so the batch isn't written again if sending a partial result fails
+        written = [cpr_case_row for cpr_case_row, _ in pending]
+        pending.clear()
+        for cpr_case_row in written:
+            checkpoint.add(_hash_cpr(cpr_case_row.cpr))
+        timing.count_rows(len(written))
+        if on_written:
+            on_written(written)
+
+    def create_queue_element(cpr_case_row: CprCaseRow, found: bool = True):
+        # Persons not found on the requested case get no reference, so they can still be looked up on the right case
+        pending.append((cpr_case_row, _hash_cpr(cpr_case_row.cpr) if found else None))
+        if len(pending) >= config.QUEUE_WRITE_BATCH_SIZE:
+            write_queue_elements()
+
+    # The references of this request's rows, so duplicates in the input are only handled once
+    seen: set[str] = set()
+
+    with PhoneCache() as cache:
+        def rows_to_look_up():
+            for cpr_case_row in cpr_cases:
+                case_reference = _hash_cpr(cpr_case_row.cpr)
+                if case_reference in checkpoint or case_reference in seen:
+                    continue
+                if cpr_case_row.phone_numbers is not None or cpr_case_row.case == "Manuel":
+                    continue
+                seen.add(case_reference)
+
+                # Cached rows are returned even if they are already in the queue from an earlier request
+                cpr_case_row.phone_numbers = cache.get(case_reference)
+                if cpr_case_row.phone_numbers is not None:
+                    references.add(case_reference)
+                    create_queue_element(cpr_case_row)
+                    continue
+
+                if case_reference in references:
+                    continue
+                references.add(case_reference)
+                yield cpr_case_row
+
+        def handle_result(cpr_case_rows: list[CprCaseRow], phone_numbers: list[list[str] | None]):
+            for cpr_case_row, numbers in zip(cpr_case_rows, phone_numbers):
+                case_reference = _hash_cpr(cpr_case_row.cpr)
+                # Persons not on the requested case aren't cached or counted as looked up, since the case number may be wrong
+                if numbers is None:
+                    references.discard(case_reference)
+                    cpr_case_row.phone_numbers = []
+                    create_queue_element(cpr_case_row, found=False)
+                    continue
+                cache.put(case_reference, numbers)
+                cpr_case_row.phone_numbers = numbers
+                create_queue_element(cpr_case_row)
+
+        try:
+            pool.run(_group_by_case(rows_to_look_up()), handle_result)
+        finally:
+            # Rows looked up before an error are still written, so a retry doesn't look them up again
+            write_queue_elements()
+
+    itk_dev_event_log.emit(orchestrator_connection.process_name, "Phone cache hits", cache.hits)
+    itk_dev_event_log.emit(orchestrator_connection.process_name, "Phone cache misses", cache.misses)
+
+
+def _group_by_case(cpr_case_rows: Iterable[CprCaseRow]) -> Iterator[list[CprCaseRow]]:
+    """Group consecutive rows with the same case number.
+    Only consecutive rows are grouped, so rows can be streamed without reading the whole input first.
+
+    Args:
+        cpr_case_rows: The rows to group.
+
+    Yields:
+        A list of rows for each run of rows with the same case.
     """
-    for cpr_case_row in email_input.cpr_cases:
-        case_reference = _hash_cpr(cpr_case_row.cpr)
-        if cpr_case_row.phone_numbers is not None or cpr_case_row.case == "Manuel" or any(orchestrator_connection.get_queue_elements(config.QUEUE_NAME, case_reference)):
-            continue
-        eflyt_search.open_case(browser, cpr_case_row.case)
-        cpr_case_row.phone_numbers = _get_phone_numbers(browser, cpr_case_row.cpr)
-        orchestrator_connection.create_queue_element(config.QUEUE_NAME, reference=case_reference, data=crypto_util.encrypt_string(json.dumps(asdict(cpr_case_row))))
+    for _, rows in itertools.groupby(cpr_case_rows, key=lambda cpr_case_row: cpr_case_row.case):
+        yield list(rows)
 
 
-def get_cases_from_queue(orchestrator_connection: OrchestratorConnection) -> list[CprCaseRow]:
-    """Retrieve NEW and IN_PROGRESS queue elements, convert them and add them to a list.
+def get_cases_from_queue(orchestrator_connection: OrchestratorConnection, request_id: str,
+                         element_ids: list[str]) -> Iterator[CprCaseRow]:
+    """Read the NEW and IN_PROGRESS queue elements created by a request, one page at a time.
+    Elements are converted as they are read, and their ids are collected so they can be marked as DONE
+    with mark_queue_elements_done once the results have been delivered. Until then a retry reads them again.
+    Elements of other requests are left untouched, even if they are for the same persons.
 
     Args:
         orchestrator_connection: Connection to use.
+        request_id: The id the elements of the request are created by, see Checkpoint.request_id.
+        element_ids: A list the id of each element read is appended to.
 
-    Returns:
-        List of CprCaseRow.
+    Yields:
+        A CprCaseRow for each queue element of the request.
+    """
+    for status in (QueueStatus.NEW, QueueStatus.IN_PROGRESS):
+        offset = 0
+        while True:
+            with timing.span("queue_read"):
+                page = orchestrator_connection.get_queue_elements(config.QUEUE_NAME, status=status, offset=offset, limit=config.QUEUE_PAGE_SIZE)
+            for element in page:
+                if element.created_by == request_id:
+                    element_ids.append(element.id)
+                    yield convert_queue_element_to_cpr_case_row(element)
+
+            if len(page) < config.QUEUE_PAGE_SIZE:
+                break
+            offset += len(page)
+
+
+def mark_queue_elements_done(orchestrator_connection: OrchestratorConnection, element_ids: Iterable[str]) -> None:
+    """Mark the queue elements of a request as DONE once its results have been delivered.
+
+    Args:
+        orchestrator_connection: Connection to use.
+        element_ids: The ids of the elements, see get_cases_from_queue.
     """
-    cases = []
-    new_elements = orchestrator_connection.get_queue_elements(config.QUEUE_NAME, status=QueueStatus.NEW, limit=999999)
-    in_progress_elements = orchestrator_connection.get_queue_elements(config.QUEUE_NAME, status=QueueStatus.IN_PROGRESS, limit=999999)
-    for element in new_elements + in_progress_elements:
-        cases.append(convert_queue_element_to_cpr_case_row(element))
-        orchestrator_connection.set_queue_element_status(element.id, QueueStatus.DONE)
-    return cases
+    with timing.span("queue_status"):
+        for element_id in element_ids:
+            orchestrator_connection.set_queue_element_status(element_id, QueueStatus.DONE)
 
 
 def convert_queue_element_to_cpr_case_row(queue_element: QueueElement) -> CprCaseRow:
@@ -101,80 +332,248 @@ def convert_queue_element_to_cpr_case_row(queue_element: QueueElement) -> CprCas
     Returns:
         CprCaseRow with the same data.
     """
-    data = json.loads(crypto_util.decrypt_string(queue_element.data))
+    data = payload.decode(queue_element.data)
     cpr_case_row = CprCaseRow(**data)
     return cpr_case_row
 
 
-def compile_results(cases: list[CprCaseRow], recipient: str, email: mail.Email, graph_access: GraphAccess):
+class _PartialCases(PartialResults):
+    """Partial results taking the rows as CprCaseRow, like compile_results."""
+    def add_cases(self, cases: list[CprCaseRow]) -> None:
+        """Add cases found, and send a partial result if one is due.
+        Phone numbers are normalized like in the queue elements the full result is read from,
+        so partial and full results show them the same way.
+        """
+        with timing.span("write_excel"):
+            rows = []
+            for cpr_case in cases:
+                if cpr_case.phone_numbers is not None:
+                    cpr_case = replace(cpr_case, phone_numbers=[payload.normalize_phone_number(number) for number in cpr_case.phone_numbers])
+                row = _result_row(cpr_case)
+                if row is not None:
+                    rows.append(row)
+        self.add(rows)
+
+
+def open_partial_results(recipient: str, email_input: EmailInput) -> _PartialCases | nullcontext:
+    """Create the partial results of an email, if config.PARTIAL_RESULTS is True.
+
+    The number of partial results sent is kept in email_input.partial_count, so a retry continues the numbering.
+
+    Args:
+        recipient: The email address to send the results to.
+        email_input: The email the results are for.
+
+    Returns:
+        A context manager giving the partial results, or None if they are turned off.
+    """
+    if not config.PARTIAL_RESULTS:
+        return nullcontext()
+
+    def send(attachments: list[smtp_util.EmailAttachment], number: int):
+        with timing.span("smtp"):
+            send_status_emails(recipient, attachments, email_input.requester, partial_number=number)
+        email_input.partial_count = number
+    return _PartialCases(RESULT_HEADER, send, config.EMAIL_ATTACHMENT, email_input.partial_count)
+
+
+def compile_results(cases: Iterable[CprCaseRow], recipient: str, email_input: EmailInput, graph_access: GraphAccess,
+                    partial_count: int = 0):
     """Write excel with results, send a reply with results and remove the email.
+    Results too large for one email are split over several emails, see delivery.fit_attachments.
 
     Args:
-        cases: _description_
-        recipient: _description_
-        email: _description_
-        graph_access: _description_
+        cases: The looked up cases of the email.
+        recipient: The email address to send the results to.
+        email_input: The email the cases came from.
+        graph_access: The GraphAccess object used to delete the email.
+        partial_count: The number of partial results already sent for the email.
     """
     # Generate output
-    file = write_excel(cases)
-    send_status_emails(recipient, file)
-    mail.delete_email(email, graph_access)
+    with StreamingExcelWriter(RESULT_HEADER) as writer:
+        with timing.span("write_excel"):
+            _append_cases(writer, cases)
+            attachments = delivery.fit_attachments(writer, config.EMAIL_ATTACHMENT)
+        with timing.span("smtp"):
+            send_status_emails(recipient, attachments, email_input.requester, after_partials=partial_count > 0)
+    with timing.span("delete_email"):
+        mail.delete_email(email_input.email, graph_access)
 
 
-def send_status_emails(recipient: str, file: BytesIO):
-    """Send an email to the requesting party and to the controller.
+def send_status_emails(recipient: str, attachments: list[smtp_util.EmailAttachment], requester: str,
+                       partial_number: int | None = None, after_partials: bool = False):
+    """Send an email to the requesting party and to the controller, one email for each attachment.
 
     Args:
-        email: The email that has been processed.
+        recipient: The email address to send the results to.
+        attachments: The Excel sheets with results, see delivery.fit_attachments.
+        requester: The email address of the person who requested the lookups.
+        partial_number (optional): The number of the partial result, if the attachments are a partial result.
+        after_partials (optional): Whether partial results were sent before this full result.
     """
-    smtp_util.send_email(
-        recipient,
-        config.EMAIL_STATUS_SENDER,
-        "RPA: Udsøgning af telefonnumre",
-        "Robotten til udsøgning af telefonnumre er nu færdig.\n\nVedhæftet denne mail finder du et excel-ark, som indeholder sags- og CPR-numre på navngivne borgere, for hvem robotten har slået op i Notus og udsøgt deres telefonnumre. Bemærk, at robotten kan have mødt fejl i systemet, hvilket vil være noteret i arket.\n\n Mvh. ITK RPA",
-        config.SMTP_SERVER,
-        config.SMTP_PORT,
-        False,
-        [smtp_util.EmailAttachment(file, config.EMAIL_ATTACHMENT)]
-    )
+    subject = f"RPA: Udsøgning af telefonnumre ({requester})"
+    if partial_number is not None:
+        subject += f" - delresultat {partial_number}"
+        body = "Robotten til udsøgning af telefonnumre er stadig i gang.\n\nVedhæftet denne mail finder du et delresultat med de telefonnumre, robotten har fundet siden sidste mail. Når robotten er færdig, modtager du det samlede resultat.\n\n Mvh. ITK RPA"
+    else:
+        body = "Robotten til udsøgning af telefonnumre er nu færdig.\n\nVedhæftet denne mail finder du et excel-ark, som indeholder sags- og CPR-numre på navngivne borgere, for hvem robotten har slået op i Notus og udsøgt deres telefonnumre. Bemærk, at robotten kan have mødt fejl i systemet, hvilket vil være noteret i arket.\n\n Mvh. ITK RPA"
+        if after_partials:
+            body = body.replace("\n\n Mvh.", " Arket indeholder alle resultater, også dem der er sendt som delresultater.\n\n Mvh.")
+
+    for i, attachment in enumerate(attachments, start=1):
+        smtp_util.send_email(
+            recipient,
+            config.EMAIL_STATUS_SENDER,
+            subject + (f" (del {i} af {len(attachments)})" if len(attachments) > 1 else ""),
+            body,
+            config.SMTP_SERVER,
+            config.SMTP_PORT,
+            False,
+            [attachment]
+        )
+
+
+def _report_time_to_first_result(orchestrator_connection: OrchestratorConnection, seconds: float) -> None:
+    """Record the seconds from starting on an email until its first result was sent, partial or full."""
+    timing.record("time_to_first_result", seconds)
+    itk_dev_event_log.emit(orchestrator_connection.process_name, "Time to first result", round(seconds))
 
 
 def _hash_cpr(cpr: str) -> str:
     return hashlib.sha256(cpr.encode()).hexdigest()
 
 
-def _get_phone_numbers(browser: webdriver.Chrome, cpr_in: str) -> list[str]:
-    """Search for a cpr number on an already open case and extract the phone numbers associated
-    with the person.
+def _lookup_phone_numbers(browser: webdriver.Chrome, cpr_case_rows: list[CprCaseRow]) -> list[list[str] | None]:
+    """Open a case in eFlyt once and find the phone numbers of each requested person on it.
+    This is run on the worker threads of a LookupPool.
+
+    Args:
+        browser: The browser session of the worker.
+        cpr_case_rows: The rows to look up. All rows must belong to the same case.
+
+    Returns:
+        The phone and mobile numbers of each person in the same order as the rows, or None for persons not on the case.
+    """
+    with timing.span("open_case"), throttle.request():
+        eflyt_search.open_case(browser, cpr_case_rows[0].case)
+    with timing.span("grid_scan"):
+        moving_persons = _get_moving_persons(browser)
+
+    phone_numbers = []
+    for row in cpr_case_rows:
+        with timing.span("person_lookup"):
+            phone_numbers.append(_get_phone_numbers(browser, moving_persons.get(row.cpr.replace("-", ""))))
+    return phone_numbers
+
+
+def _lookup_phone_numbers_http(session: eflyt_http.EflytHttpSession, cpr_case_rows: list[CprCaseRow]) -> list[list[str] | None]:
+    """Open a case in eFlyt over HTTP once and find the phone numbers of each requested person on it.
+    This is run on the worker threads of a LookupPool.
+
+    Args:
+        session: The HTTP session of the worker.
+        cpr_case_rows: The rows to look up. All rows must belong to the same case.
+
+    Returns:
+        The phone and mobile numbers of each person in the same order as the rows, or None for persons not on the case.
+    """
+    with timing.span("open_case"):
+        session.open_case(cpr_case_rows[0].case)
+    with timing.span("grid_scan"):
+        moving_persons = session.get_moving_persons()
+
+    phone_numbers = []
+    for row in cpr_case_rows:
+        person = moving_persons.get(row.cpr.replace("-", ""))
+        with timing.span("person_lookup"):
+            phone_numbers.append(_combine_phone_numbers(*session.get_phone_numbers(person)) if person else None)
+    return phone_numbers
+
+
+def _get_moving_persons(browser: webdriver.Chrome) -> dict[str, MovingPerson]:
+    """Read the moving persons on an already open case.
+    Depending on config.GRID_EXTRACTION_MODE the table is either read in a single script call,
+    or element by element. If the script fails the table is read element by element.
 
     Args:
         browser: The browser object.
-        cpr_in: The cpr number to look for.
 
     Returns:
-        The persons phone and mobile numbers.
+        A dict mapping each cpr number without dash to the person.
     """
-    table = browser.find_element(By.ID, "ctl00_ContentPlaceHolder2_GridViewMovingPersons")
+    if config.GRID_EXTRACTION_MODE == "script":
+        try:
+            rows = browser.execute_script(_READ_MOVING_PERSONS_SCRIPT, config.MOVING_PERSONS_TABLE_ID)
+        except JavascriptException:
+            rows = None
+        if rows is not None:
+            return {row["cpr"].replace("-", ""): MovingPerson(**row) for row in rows}
+
+    return _get_moving_persons_by_element(browser)
+
+
+def _get_moving_persons_by_element(browser: webdriver.Chrome) -> dict[str, MovingPerson]:
+    """Read the moving persons on an already open case one element at a time.
+
+    Args:
+        browser: The browser object.
+
+    Returns:
+        A dict mapping each cpr number without dash to the person.
+    """
+    table = browser.find_element(By.ID, config.MOVING_PERSONS_TABLE_ID)
     rows = table.find_elements(By.TAG_NAME, "tr")
-    cpr_in = cpr_in.replace("-", "")
 
-    # Remove header row
-    rows.pop(0)
+    moving_persons = {}
+    # Skip header row
+    for row_number, row in enumerate(rows[1:], start=2):
+        cpr = row.find_element(By.XPATH, "td[2]/a[2]").text
+        name = row.find_element(By.XPATH, "td[3]").text
+        moving_persons[cpr.replace("-", "")] = MovingPerson(cpr, row_number, name)
+    return moving_persons
 
-    for row in rows:
-        cpr_link = row.find_element(By.XPATH, "td[2]/a[2]")
-        cpr = cpr_link.text.replace("-", "")
 
-        if cpr == cpr_in:
-            cpr_link.click()
-            break
+def _get_phone_numbers(browser: webdriver.Chrome, person: MovingPerson | None) -> list[str] | None:
+    """Open a person from the moving persons table on an already open case and extract the phone numbers associated
+    with the person.
 
-    # Find the phone numbers if they exists
-    phone_number_fields = browser.find_elements(By.ID, "ctl00_ContentPlaceHolder2_ptFanePerson_stcPersonTab1_lblTlfnrTxt")
-    phone_number = phone_number_fields[0].text if phone_number_fields else None
-    mobile_number_fields = browser.find_elements(By.ID, "ctl00_ContentPlaceHolder2_ptFanePerson_stcPersonTab1_lblMobilTxt")
-    mobile_number = mobile_number_fields[0].text if mobile_number_fields else None
+    Args:
+        browser: The browser object.
+        person: The person to open. If None the person isn't on the case.
+
+    Returns:
+        The persons phone and mobile numbers, or None if the person isn't on the case.
+    """
+    if person is None:
+        return None
+
+    # The request lasts until the labels of the reloaded page are read
+    with throttle.request():
+        # The table is found again since the page is reloaded every time a person is opened
+        browser.find_element(By.XPATH, f'(//*[@id="{config.MOVING_PERSONS_TABLE_ID}"]//tr)[{person.row_number}]/td[2]/a[2]').click()
+
+        # Find the phone numbers if they exists
+        if config.GRID_EXTRACTION_MODE == "script":
+            try:
+                phone_number, mobile_number = browser.execute_script(_READ_LABELS_SCRIPT, config.PHONE_NUMBER_LABEL_ID, config.MOBILE_NUMBER_LABEL_ID)
+            except JavascriptException:
+                phone_number, mobile_number = _get_phone_number_labels_by_element(browser)
+        else:
+            phone_number, mobile_number = _get_phone_number_labels_by_element(browser)
+
+    return _combine_phone_numbers(phone_number, mobile_number)
+
+
+def _combine_phone_numbers(phone_number: str | None, mobile_number: str | None) -> list[str]:
+    """Combine the phone and mobile number of a person into a list, leaving out any that are empty.
+
+    Args:
+        phone_number: The text of the phone number label.
+        mobile_number: The text of the mobile number label.
 
+    Returns:
+        The persons phone and mobile numbers.
+    """
     numbers = []
     if phone_number:
         numbers.append(phone_number)
@@ -184,53 +583,36 @@ def _get_phone_numbers(browser: webdriver.Chrome, cpr_in: str) -> list[str]:
     return numbers
 
 
-def write_excel(cases: list[CprCaseRow]) -> BytesIO:
-    """Write a list of task objects to an excel sheet.
+def _get_phone_number_labels_by_element(browser: webdriver.Chrome) -> tuple[str | None, str | None]:
+    """Read the phone and mobile number labels of the open person one element at a time.
 
     Args:
-        tasks: The list of task objects to write.
+        browser: The browser object.
 
     Returns:
-        A BytesIO object containing the Excel sheet.
+        The text of the phone and mobile number labels, or None if they don't exist.
     """
-    wb = Workbook()
-    sheet: Worksheet = wb.active
-    header = ["Sagsnr.", "CPR", "Navn", "Telefonnumre"]
-    sheet.append(header)
-
-    # Populate the sheet
-    for cpr_case in cases:
-        if cpr_case.phone_numbers == ["N/A"] or cpr_case.phone_numbers is None:  # Skip any entries without a phone number
-            continue
-        phone_numbers = convert_phone_number((cpr_case.phone_numbers))
-        row = [cpr_case.case, cpr_case.cpr, cpr_case.name, phone_numbers]
-        sheet.append(row)
-
-    # Styling
-    set_column_width(sheet)
-    for cell in sheet[1]:
-        cell.font = Font(bold=True)
+    phone_number_fields = browser.find_elements(By.ID, config.PHONE_NUMBER_LABEL_ID)
+    phone_number = phone_number_fields[0].text if phone_number_fields else None
+    mobile_number_fields = browser.find_elements(By.ID, config.MOBILE_NUMBER_LABEL_ID)
+    mobile_number = mobile_number_fields[0].text if mobile_number_fields else None
+    return phone_number, mobile_number
 
-    # Save the file
-    file = BytesIO()
-    wb.save(file)
-    return file
 
+def _append_cases(writer: StreamingExcelWriter, cases: Iterable[CprCaseRow]) -> None:
+    """Add the cases with phone numbers to a result sheet."""
+    for cpr_case in cases:
+        row = _result_row(cpr_case)
+        if row is not None:
+            writer.append(row)
 
-def set_column_width(work_sheet: Worksheet):
-    """Adjust column width to the widest content in the worksheet
 
-    Args:
-        work_sheet: The worksheet to mutate
-    """
-    for col in work_sheet.columns:
-        max_length = 0
-        column = col[0].column_letter  # Get the column name
-        for cell in col:
-            if len(str(cell.value)) > max_length:
-                max_length = len(cell.value)
-        adjusted_width = max_length + 2
-        work_sheet.column_dimensions[column].width = adjusted_width
+def _result_row(cpr_case: CprCaseRow) -> list[Any] | None:
+    """Get the values of a case in the result sheet, or None if it has no phone numbers."""
+    if cpr_case.phone_numbers == ["N/A"] or cpr_case.phone_numbers is None:  # Skip any entries without a phone number
+        return None
+    phone_numbers = convert_phone_number((cpr_case.phone_numbers))
+    return [cpr_case.case, cpr_case.cpr, cpr_case.name, phone_numbers]
 
 
 def convert_phone_number(phone_numbers: list[str] | None) -> str:
@@ -0,0 +1,73 @@
+"""This module contains an in-memory index of the references already used in a queue.
+It replaces a database lookup per row with a single paginated read of the queue.
+"""
+
+import time
+from datetime import datetime
+
+from OpenOrchestrator.orchestrator_connection.connection import OrchestratorConnection
+
+from robot_framework import config
+
+
+class ReferenceIndex:
+    """A set of all references in a queue, read in pages from OpenOrchestrator.
+    The index is refreshed with any newer queue elements when it's older than the refresh interval.
+    """
+    def __init__(self, orchestrator_connection: OrchestratorConnection, queue_name: str,
+                 page_size: int | None = None, refresh_interval: float | None = None):
+        """
+        Args:
+            orchestrator_connection: Connection used to read the queue.
+            queue_name: The name of the queue to index.
+            page_size: The number of queue elements to read per request. Defaults to config.QUEUE_PAGE_SIZE.
+            refresh_interval: The number of seconds before the index is refreshed. Defaults to config.REFERENCE_INDEX_REFRESH_INTERVAL.
+        """
+        self._orchestrator_connection = orchestrator_connection
+        self._queue_name = queue_name
+        self._page_size = page_size or config.QUEUE_PAGE_SIZE
+        self._refresh_interval = config.REFERENCE_INDEX_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self._references: set[str] = set()
+        self._newest: datetime | None = None
+        self._refreshed_at = 0.0
+        self.refresh()
+
+    def __contains__(self, reference: str) -> bool:
+        if time.monotonic() - self._refreshed_at > self._refresh_interval:
+            self.refresh()
+        return reference in self._references
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    def add(self, reference: str) -> None:
+        """Add a reference to the index without touching the queue.
+
+        Args:
+            reference: The reference to add.
+        """
+        self._references.add(reference)
+
+    def discard(self, reference: str) -> None:
+        """Remove a reference added to the index, if it's there.
+
+        Args:
+            reference: The reference to remove.
+        """
+        self._references.discard(reference)
+
+    def refresh(self) -> None:
+        """Read all queue elements created since the last refresh and add their references."""
+        from_date = self._newest
+        offset = 0
+        while True:
+            page = self._orchestrator_connection.get_queue_elements(self._queue_name, offset=offset, limit=self._page_size, from_date=from_date)
+            for element in page:
+                if element.reference:
+                    self._references.add(element.reference)
+                if self._newest is None or element.created_date > self._newest:
+                    self._newest = element.created_date
+            if len(page) < self._page_size:
+                break
+            offset += len(page)
+        self._refreshed_at = time.monotonic()
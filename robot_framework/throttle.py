@@ -0,0 +1,169 @@
+"""This module paces the requests to eFlyt, shared by all lookup sessions of the process.
+Requests take a token from a token bucket filled at the current rate. The rate follows how eFlyt responds:
+it grows slowly while requests are fast and succeed, and is cut by a factor when a request is slow or fails.
+Only requests sent after the last cut can cut the rate again, so a burst of failures from parallel sessions only counts once.
+Wrap each request to eFlyt in `with throttle.request():`, and call throttle.reset at the start of each try,
+so the try starts at the configured rate and its stats only cover that try.
+When config.THROTTLE_ENABLED is False, requests aren't paced.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+from robot_framework import config
+
+
+# pylint: disable-next=too-many-instance-attributes
+class Throttle:
+    """A token bucket whose rate is adjusted by additive increase and multiplicative decrease. Thread safe."""
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, *, start_rate: float | None = None, min_rate: float | None = None, max_rate: float | None = None,
+                 target_latency: float | None = None, increase: float | None = None, decrease: float | None = None,
+                 burst: int | None = None):
+        """Arguments left as None are read from config when the throttle is created.
+
+        Args:
+            start_rate: The requests per second to start at. Defaults to config.THROTTLE_START_RATE.
+            min_rate: The lowest rate. Defaults to config.THROTTLE_MIN_RATE.
+            max_rate: The highest rate. Defaults to config.THROTTLE_MAX_RATE.
+            target_latency: Requests slower than this many seconds count as eFlyt slowing down. Defaults to config.THROTTLE_TARGET_LATENCY.
+            increase: The requests per second the rate grows by each second. Defaults to config.THROTTLE_INCREASE.
+            decrease: The factor the rate is multiplied by on a slow or failed request. Defaults to config.THROTTLE_DECREASE.
+            burst: The most tokens the bucket holds. Defaults to config.THROTTLE_BURST.
+        """
+        self.min_rate = config.THROTTLE_MIN_RATE if min_rate is None else min_rate
+        self.max_rate = config.THROTTLE_MAX_RATE if max_rate is None else max_rate
+        self.rate = min(max(config.THROTTLE_START_RATE if start_rate is None else start_rate, self.min_rate), self.max_rate)
+        self._target_latency = config.THROTTLE_TARGET_LATENCY if target_latency is None else target_latency
+        self._increase = config.THROTTLE_INCREASE if increase is None else increase
+        self._decrease = config.THROTTLE_DECREASE if decrease is None else decrease
+        self._burst = burst or config.THROTTLE_BURST
+
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._filled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self.requests = 0
+        self.slowdowns = 0
+        self.failures = 0
+        self.peak_rate = self.rate
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._filled_at) * self.rate)
+                self._filled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def record(self, latency: float, failed: bool = False) -> None:
+        """Adjust the rate by how a request went.
+
+        Args:
+            latency: The seconds the request took.
+            failed: Whether the request failed.
+        """
+        with self._lock:
+            if failed:
+                self.failures += 1
+            if not failed and latency <= self._target_latency:
+                # Grows by the increase each second at the current rate
+                self.rate = min(self.max_rate, self.rate + self._increase / self.rate)
+                self.peak_rate = max(self.peak_rate, self.rate)
+                return
+
+            if not failed:
+                self.slowdowns += 1
+            now = time.monotonic()
+            # Requests sent before the last decrease reflect the old rate
+            if now - latency < self._decreased_at:
+                return
+            self._decreased_at = now
+            self.rate = max(self.min_rate, self.rate * self._decrease)
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        """Wait for a token, then time the request inside the context and record how it went.
+        Any error raised inside the context counts as a failed request.
+        """
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - start, failed=True)
+            raise
+        self.record(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        """Get the current rate and the counts of the throttle.
+
+        Returns:
+            A dict with the current and peak rate in requests per second, and the number of requests, slow requests and failed requests.
+        """
+        with self._lock:
+            return {"rate": self.rate, "peak_rate": self.peak_rate, "requests": self.requests,
+                    "slowdowns": self.slowdowns, "failures": self.failures}
+
+
+_NULL_REQUEST = nullcontext()
+_throttle: dict[str, Throttle | None] = {"shared": None}
+_throttle_lock = threading.Lock()
+
+
+def request():
+    """Pace a request to eFlyt with the throttle shared by the process.
+
+    Returns:
+        A context manager to send the request inside.
+    """
+    if not config.THROTTLE_ENABLED:
+        return _NULL_REQUEST
+    return get().request()
+
+
+def get() -> Throttle:
+    """Get the throttle shared by the process, creating it from config on first use."""
+    with _throttle_lock:
+        if _throttle["shared"] is None:
+            _throttle["shared"] = Throttle()
+        return _throttle["shared"]
+
+
+def reset() -> None:
+    """Drop the shared throttle, so the next request starts a new one from config."""
+    with _throttle_lock:
+        _throttle["shared"] = None
+
+
+def emit_stats(process_name: str) -> dict | None:
+    """Send the current rate and counts of the shared throttle to the event log.
+    The rates are sent in requests per minute, since the event log only holds integer counts.
+    Does nothing if the throttle is disabled or unused.
+
+    Args:
+        process_name: The name of the process emitting the stats.
+
+    Returns:
+        The stats, if the throttle has been used.
+    """
+    if not config.THROTTLE_ENABLED or _throttle["shared"] is None:
+        return None
+
+    # pylint: disable-next=import-outside-toplevel
+    import itk_dev_event_log
+
+    stats = get().stats()
+    itk_dev_event_log.emit(process_name, "eFlyt rate per minute", round(stats["rate"] * 60))
+    itk_dev_event_log.emit(process_name, "eFlyt peak rate per minute", round(stats["peak_rate"] * 60))
+    itk_dev_event_log.emit(process_name, "eFlyt slow requests", stats["slowdowns"])
+    itk_dev_event_log.emit(process_name, "eFlyt failed requests", stats["failures"])
+    return stats
@@ -0,0 +1,151 @@
+"""This module contains a lightweight timing layer used to measure the stages of a run.
+Wrap a stage in `with timing.span("name"):` and count handled rows with timing.count_rows.
+Call timing.reset at the start of each try, so the report only covers that try.
+When config.TIMING_ENABLED is False, spans are a shared no-op context manager.
+"""
+
+import json
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from robot_framework import config
+
+_NULL_SPAN = nullcontext()
+
+_lock = threading.Lock()
+_durations: dict[str, list[float]] = {}
+_run = {"rows": 0, "started": time.perf_counter()}
+
+
+class _Span:
+    """A context manager recording the time spent inside it under a stage name."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        duration = time.perf_counter() - self.start
+        with _lock:
+            _durations.setdefault(self.name, []).append(duration)
+
+
+def span(name: str) -> _Span | nullcontext:
+    """Time a stage of the run.
+
+    Args:
+        name: The name of the stage.
+
+    Returns:
+        A context manager timing the code inside it.
+    """
+    if not config.TIMING_ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def record(name: str, seconds: float) -> None:
+    """Record a duration measured outside a span as a stage, e.g. the time until the first result is sent.
+
+    Args:
+        name: The name of the stage.
+        seconds: The duration.
+    """
+    if config.TIMING_ENABLED:
+        with _lock:
+            _durations.setdefault(name, []).append(seconds)
+
+
+def count_rows(count: int = 1) -> None:
+    """Count rows handled in the run, used to calculate rows per second.
+
+    Args:
+        count: The number of rows to count.
+    """
+    if config.TIMING_ENABLED:
+        with _lock:
+            _run["rows"] += count
+
+
+def reset() -> None:
+    """Clear all recorded timings and restart the run clock."""
+    with _lock:
+        _durations.clear()
+        _run["rows"] = 0
+        _run["started"] = time.perf_counter()
+
+
+def report() -> dict:
+    """Summarize the recorded timings.
+
+    Returns:
+        A dict with the run's duration, rows and rows per second,
+        and the count, total, p50, p95 and max in seconds of each stage.
+    """
+    with _lock:
+        durations = {name: sorted(values) for name, values in _durations.items()}
+        rows = _run["rows"]
+        seconds = time.perf_counter() - _run["started"]
+
+    stages = {}
+    for name, values in durations.items():
+        stages[name] = {
+            "count": len(values),
+            "total": sum(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "max": values[-1],
+        }
+
+    return {
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_second": rows / seconds if seconds else 0,
+        "stages": stages,
+    }
+
+
+def emit_report(process_name: str) -> dict | None:
+    """Send a summary of the recorded timings to the event log and write it as a json file to config.TIMING_REPORT_FOLDER.
+    Durations are sent to the event log in whole milliseconds, since the event log only holds integer counts.
+    Does nothing if timing is disabled.
+
+    Args:
+        process_name: The name of the process emitting the report.
+
+    Returns:
+        The report, if timing is enabled.
+    """
+    if not config.TIMING_ENABLED:
+        return None
+
+    # The event log pulls in pyodbc, so it's only imported when there is something to report
+    import itk_dev_event_log  # pylint: disable=import-outside-toplevel
+
+    summary = report()
+
+    folder = Path(config.TIMING_REPORT_FOLDER)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"timing_{datetime.now():%Y%m%d_%H%M%S}.json"
+    path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    itk_dev_event_log.emit(process_name, "Rows per second", round(summary["rows_per_second"]))
+    for name, stage in summary["stages"].items():
+        for key in ("p50", "p95", "max"):
+            itk_dev_event_log.emit(process_name, f"Timing {name} {key} ms", round(stage[key] * 1000))
+
+    return summary
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    """Find the nearest-rank percentile of a sorted list."""
+    index = max(0, -(-len(sorted_values) * percentile // 100) - 1)
+    return sorted_values[int(index)]